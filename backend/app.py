@@ -1,17 +1,35 @@
 import os
-from flask import Flask, jsonify, request, session, make_response
+from flask import Flask, Response, jsonify, request, session, make_response, stream_with_context
 from flask_cors import CORS
 from flask_restful import Api, Resource
 from flask_migrate import Migrate
-from models import db, bcrypt, User, Property, Unit, Tenant, Lease, Payment, Expense
-from datetime import datetime, date, timedelta
-from collections import defaultdict
+from sqlalchemy import insert, select, update, and_, or_
+from database import database_uri, engine_options, sqlite_pragmas, init_engine
+from models import db, User, Property, Unit, Tenant, Lease, Payment, Expense
+from reports import GRANULARITIES, DASHBOARD_TABLES, FINANCIALS_TABLES, dashboard_summary, property_financials
+from ledger import LEDGER_FIELDS, ledger_cli, refresh_ledgers
+from arrears import ARREARS_PAGE_SIZE, ARREARS_TABLES, arrears_report
+from rent_roll import MAX_HORIZON, RENT_ROLL_TABLES, rent_roll
+from search import SEARCH_PAGE_SIZE, SEARCH_SOURCES, search, search_cli
+from rollups import rollups_cli, payment_buckets, expense_buckets, refresh_rollups, replace_rollups
+from bulk import MAX_BULK_IDS, cascade_delete
+from query_plans import check_query_plans_command
+from query_shapes import check_query_budgets_command, init_detector
+from querying import (MAX_PAGE_SIZE, encode_cursor, decode_cursor, parse_param, parse_limit, parse_date, json_value,
+                      parse_expand, loader_options)
+from exports import EXPORT_BATCH_SIZE, EXPORT_MIMETYPES, export_chunks
+from serializers import serializer_for, to_dict, dumps, relationship_paths
+from versions import bump_versions, table_etag
+from cache import response_cache
+from jobs import JobQueueFull, report_jobs
+from metrics import metrics, timed
+from passwords import HasherBusy, password_hasher
+from datetime import datetime, date
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 
-# NOTE: The DATABASE variable is now only used as a default
-DATABASE = os.environ.get(
-    "DB_URI", f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}")
+# DB_URI selects the database (PostgreSQL on Render); the local SQLite file is the default
+DATABASE = database_uri(f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}")
 
 # CRITICAL: Define the main Vercel domain
 VERCEL_FRONTEND_URL = "https://rental-and-income-management-system.vercel.app"
@@ -22,10 +40,31 @@ VERCEL_PREVIEW_URL = "https://rental-and-income-management-system-git-main-jwanj
 app = Flask(__name__)
 app.secret_key = b'_5#y2L"F4Q8z\n\xec]/'
 
-# CRITICAL FIX: Hard-code the SQLite URI to ensure local database usage on Render
-app.config["SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(BASE_DIR, 'app.db')}"
+app.config["SQLALCHEMY_DATABASE_URI"] = DATABASE
+# Pool sizing from DB_POOL_SIZE / DB_MAX_OVERFLOW / DB_POOL_TIMEOUT / DB_POOL_RECYCLE / DB_POOL_PRE_PING
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(DATABASE)
+# journal_mode, busy_timeout, synchronous, cache_size and mmap_size from SQLITE_* variables
+app.config["SQLITE_PRAGMAS"] = sqlite_pragmas()
 
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+app.config["RESPONSE_CACHE_SIZE"] = int(os.environ.get("RESPONSE_CACHE_SIZE", 256))
+# Set to a file path to share cached reports between worker processes
+app.config["RESPONSE_CACHE_PATH"] = os.environ.get("RESPONSE_CACHE_PATH")
+app.config["REPORT_JOB_WORKERS"] = int(os.environ.get("REPORT_JOB_WORKERS", 2))
+app.config["REPORT_JOB_QUEUE_SIZE"] = int(os.environ.get("REPORT_JOB_QUEUE_SIZE", 16))
+app.config["REPORT_JOB_TTL"] = int(os.environ.get("REPORT_JOB_TTL", 600))
+# Set to a file path so any worker process can answer a job poll
+app.config["REPORT_JOB_STORE_PATH"] = os.environ.get("REPORT_JOB_STORE_PATH")
+# Development aid: warn or raise when one statement shape repeats more than NPLUSONE_THRESHOLD times
+app.config["NPLUSONE_MODE"] = os.environ.get("NPLUSONE_MODE", "off")
+app.config["NPLUSONE_THRESHOLD"] = int(os.environ.get("NPLUSONE_THRESHOLD", 5))
+# bcrypt cost; existing hashes are upgraded on the next successful login
+app.config["BCRYPT_LOG_ROUNDS"] = int(os.environ.get("BCRYPT_LOG_ROUNDS", 12))
+# Concurrent hashes per process, and how many more may wait before auth requests get a 503
+app.config["PASSWORD_HASH_WORKERS"] = int(os.environ.get("PASSWORD_HASH_WORKERS", 2))
+app.config["PASSWORD_HASH_QUEUE_SIZE"] = int(os.environ.get("PASSWORD_HASH_QUEUE_SIZE", 8))
+app.config["PASSWORD_HASH_POOL"] = os.environ.get("PASSWORD_HASH_POOL", "thread")
+app.config["METRICS_ENABLED"] = os.environ.get("METRICS_ENABLED", "true").lower() in ("1", "true", "yes")
 app.json.compact = False
 
 # --- CRITICAL COOKIE CONFIGURATION FOR CROSS-SITE (Vercel to Render) ---
@@ -35,8 +74,28 @@ app.config["SESSION_COOKIE_SECURE"] = True
 
 migrate = Migrate(app, db)
 db.init_app(app)
-bcrypt.init_app(app)
+init_engine(app, db)
+password_hasher.init_app(app)
+response_cache.init_app(app)
+report_jobs.init_app(app)
+metrics.init_app(app)
+init_detector(app)
 api = Api(app)
+app.cli.add_command(ledger_cli)
+app.cli.add_command(rollups_cli)
+app.cli.add_command(search_cli)
+app.cli.add_command(check_query_plans_command)
+app.cli.add_command(check_query_budgets_command)
+
+
+@api.representation('application/json')
+def output_json(data, code, headers=None):
+    with timed('serialize'):
+        body = dumps(data, indent=app.debug)
+    resp = make_response(body, code)
+    resp.headers.extend(headers or {})
+    return resp
+
 
 # --- CORS Configuration FIX (Includes both Vercel domains) ---
 CORS(app,
@@ -46,12 +105,19 @@ CORS(app,
          VERCEL_PREVIEW_URL,  # <-- NEWLY ADDED PREVIEW URL
          "http://127.0.0.1:5173",
          "http://localhost:5173"
-     ]
+     ],
+     expose_headers=["X-Next-Cursor", "Content-Disposition", "ETag", "Location", "Server-Timing"]
      )
 
 # --- Auth Routes (NO /api prefix) ---
 
 
+@app.errorhandler(HasherBusy)
+def password_hasher_busy(e):
+    db.session.rollback()
+    return make_response(jsonify({"error": "Too many sign-in requests, try again shortly"}), 503, {"Retry-After": "1"})
+
+
 @app.route("/register", methods=["POST"])
 def register():
     data = request.get_json()
@@ -73,6 +139,7 @@ def login():
     data = request.get_json()
     user = User.query.filter_by(username=data.get('username')).first()
     if user and user.authenticate(data.get('password')):
+        db.session.commit()
         session['user_id'] = user.id
         return jsonify(user.to_dict()), 200
     return make_response(jsonify({'error': 'Invalid username or password'}), 401)
@@ -123,131 +190,534 @@ def update_profile():
 
 @app.route("/dashboard_summary")
 def get_dashboard_summary():
-    leases = Lease.query.all()
-    today = date.today()
-    expiring_limit = today + timedelta(days=60)
-    summary = {
-        "total_properties": Property.query.count(),
-        "occupied_units": Unit.query.filter_by(status='occupied').count(),
-        "vacant_units": Unit.query.filter_by(status='vacant').count(),
-        "total_monthly_rent": sum(l.rent_amount for l in leases),
-        "total_collected": sum(l.total_paid for l in leases),
-        "total_pending": sum(l.balance for l in leases if l.balance > 0),
-        "expiring_leases_count": Lease.query.filter(Lease.end_date <= expiring_limit, Lease.end_date >= today).count(),
-        "overdue_leases": [{"lease_id": l.id, "tenant_name": l.tenant.name, "unit_number": l.unit.unit_number, "balance": l.balance} for l in leases if l.balance > 0]
-    }
-    return jsonify(summary)
+    return jsonify(dashboard_report(date.today()))
 
 
 @app.route("/reports/property_financials")
 def get_property_financials():
-    property_id = request.args.get('property_id')
-    year = int(request.args.get('year'))
-    payments_query = Payment.query.filter(
-        db.extract('year', Payment.date) == year)
-    expenses_query = Expense.query.filter(
-        db.extract('year', Expense.date) == year)
-
-    if property_id and property_id != 'all':
-        property_id = int(property_id)
-        payments_query = payments_query.join(Lease).join(
-            Unit).filter(Unit.property_id == property_id)
-        expenses_query = expenses_query.filter(
-            Expense.property_id == property_id)
-
-    monthly_data = defaultdict(lambda: {'income': 0, 'expense': 0})
-    for p in payments_query.all():
-        monthly_data[p.date.month]['income'] += p.amount
-    for e in expenses_query.all():
-        monthly_data[e.date.month]['expense'] += e.amount
-
-    chart_data = []
-    month_names = ["Jan", "Feb", "Mar", "Apr", "May",
-                   "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    for i in range(1, 13):
-        income = monthly_data[i]['income']
-        expense = monthly_data[i]['expense']
-        chart_data.append(
-            {"name": month_names[i-1], "Income": income, "Expense": expense, "Net Profit": income - expense})
-
-    expenses = expenses_query.all()
-    category_data = defaultdict(float)
-    for e in expenses:
-        category_data[e.category] += e.amount
-    expense_breakdown = [{"name": cat, "value": val}
-                         for cat, val in category_data.items()]
-
-    total_income = sum(p.amount for p in payments_query.all())
-    total_expense = sum(e.amount for e in expenses)
-    occupancy_rate = 0
-
-    if property_id and property_id != 'all':
-        prop = db.session.get(Property, property_id)
-        total_units = len(prop.units) if prop and prop.units else 0
-        if total_units > 0:
-            occupied_units = Unit.query.filter_by(
-                property_id=property_id, status='occupied').count()
-            occupancy_rate = (occupied_units / total_units) * \
-                100 if total_units > 0 else 0
-    else:
-        total_units = Unit.query.count()
-        if total_units > 0:
-            occupied_units = Unit.query.filter_by(status='occupied').count()
-            occupancy_rate = (occupied_units / total_units) * \
-                100 if total_units > 0 else 0
+    try:
+        property_id, start, end, granularity = financials_args(request.args)
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    return jsonify(financials_report(property_id, start, end, granularity))
+
+
+@app.route("/reports/arrears")
+def get_arrears():
+    try:
+        args = arrears_args(request.args)
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    return jsonify(arrears(*args))
+
+
+@app.route("/reports/rent_roll")
+def get_rent_roll():
+    try:
+        args = rent_roll_args(request.args)
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    return jsonify(rent_roll_report(*args))
+
+
+def dashboard_report(today):
+    return response_cache.fetch(
+        ["dashboard_summary", today], DASHBOARD_TABLES, lambda: dashboard_summary(today))
+
+
+def financials_report(property_id, start, end, granularity):
+    return response_cache.fetch(
+        ["property_financials", property_id, start, end, granularity], FINANCIALS_TABLES,
+        lambda: property_financials(property_id, start, end, granularity))
+
 
-    return jsonify({
-        "total_income": total_income, "total_expense": total_expense, "net_profit": total_income - total_expense,
-        "occupancy_rate": round(occupancy_rate, 2), "monthly_breakdown": chart_data, "expense_breakdown": expense_breakdown
-    })
+def arrears(as_of, property_id, limit):
+    return response_cache.fetch(
+        ["arrears", as_of, property_id, limit], ARREARS_TABLES, lambda: arrears_report(as_of, property_id, limit))
+
+
+def rent_roll_report(first_month, months, property_id):
+    today = date.today()
+    return response_cache.fetch(
+        ["rent_roll", first_month, months, property_id, today], RENT_ROLL_TABLES,
+        lambda: rent_roll(first_month, months, today, property_id))
+
+
+def report_property_id(args):
+    """The ?property_id= of a report, or None for 'all' or when absent"""
+    property_id = args.get('property_id')
+    if not property_id or property_id == 'all':
+        return None
+    try:
+        return int(property_id)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid property_id: {property_id}")
+
+
+def financials_args(args):
+    """(property_id, start, end, granularity) of a property_financials request"""
+    return (report_property_id(args), *report_range(args))
+
+
+def arrears_args(args):
+    """(as_of, property_id, limit) of an arrears request; as_of defaults to today"""
+    as_of = parse_date(args['as_of']) if args.get('as_of') else date.today()
+    return as_of, report_property_id(args), parse_limit(args.get('limit')) or ARREARS_PAGE_SIZE
+
+
+def rent_roll_args(args):
+    """(first month, months, property_id) of a rent roll request; from=YYYY-MM defaults to this month"""
+    try:
+        first_month = datetime.strptime(args['from'], '%Y-%m').date() if args.get('from') else date.today().replace(day=1)
+        months = int(args.get('months', 12))
+    except ValueError:
+        raise ValueError("from must be YYYY-MM and months a whole number")
+    if not 1 <= months <= MAX_HORIZON:
+        raise ValueError(f"months must be between 1 and {MAX_HORIZON}")
+    return first_month, months, report_property_id(args)
+
+
+def report_job(report, params):
+    """Validate a report job request and return the callable that computes it"""
+    if report == "property_financials":
+        args = financials_args(params)
+        return lambda: financials_report(*args)
+    if report == "arrears":
+        args = arrears_args(params)
+        return lambda: arrears(*args)
+    if report == "rent_roll":
+        args = rent_roll_args(params)
+        return lambda: rent_roll_report(*args)
+    if report == "dashboard_summary":
+        today = date.today()
+        return lambda: dashboard_report(today)
+    raise ValueError(f"Unknown report: {report}")
+
+
+@app.route("/reports/jobs", methods=["POST"])
+def create_report_job():
+    data = request.get_json() or {}
+    params = data.get('params') or {}
+    if not isinstance(params, dict):
+        return make_response(jsonify({"error": "params must be a JSON object"}), 400)
+    # Parsed like the query string of the matching GET, so 20250101 is read as "20250101"
+    params = {key: str(value) for key, value in params.items() if value is not None}
+    try:
+        compute = report_job(data.get('report'), params)
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    try:
+        job = report_jobs.submit(data['report'], params, compute)
+    except JobQueueFull as e:
+        return make_response(jsonify({"error": str(e)}), 503, {"Retry-After": "5"})
+    return make_response(jsonify(job), 202, {"Location": f"/reports/jobs/{job['id']}"})
+
+
+@app.route("/reports/jobs/<job_id>")
+def get_report_job(job_id):
+    job = report_jobs.get(job_id)
+    if job is None:
+        return make_response(jsonify({"error": "Report job not found or expired"}), 404)
+    return jsonify(job)
+
+
+@app.route("/search")
+def get_search():
+    q = request.args.get('q', '').strip()
+    if not q:
+        return make_response(jsonify({"error": "q is required"}), 400)
+    kinds = [kind.strip() for kind in request.args.get('type', ','.join(SEARCH_SOURCES)).split(',') if kind.strip()]
+    unknown = [kind for kind in kinds if kind not in SEARCH_SOURCES]
+    if unknown or not kinds:
+        return make_response(jsonify({"error": f"type must be one or more of {', '.join(SEARCH_SOURCES)}"}), 400)
+    try:
+        limit = parse_limit(request.args.get('limit')) or SEARCH_PAGE_SIZE
+        (offset,) = decode_cursor(request.args['after'], 1) if request.args.get('after') else (0,)
+        if offset < 0:
+            raise ValueError("Invalid cursor")
+    except ValueError as e:
+        return make_response(jsonify({"error": str(e)}), 400)
+    results = search(q, kinds, limit + 1, offset)
+    headers = {}
+    if len(results) > limit:
+        results = results[:limit]
+        headers['X-Next-Cursor'] = encode_cursor([offset + limit])
+    return make_response(jsonify(results), 200, headers)
+
+
+@app.route("/cache/stats")
+def get_cache_stats():
+    return jsonify(response_cache.stats())
+
+
+def report_range(args):
+    """[from, to) and granularity of a report; ?year= is shorthand for one calendar year"""
+    granularity = args.get('granularity', 'month')
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+    if args.get('from') or args.get('to'):
+        if not (args.get('from') and args.get('to')):
+            raise ValueError("Both from and to are required")
+        start, end = parse_date(args['from']), parse_date(args['to'])
+    else:
+        year = int(args.get('year', date.today().year))
+        start, end = date(year, 1, 1), date(year + 1, 1, 1)
+    if end <= start:
+        raise ValueError("to must be after from")
+    return start, end, granularity
 
 # --- Generic Resources (Standard Flask-RESTful structure) ---
 
 
+def parse_dates(data):
+    for key in ['start_date', 'end_date', 'date']:
+        if key in data and data.get(key):
+            data[key] = datetime.strptime(data[key], '%Y-%m-%d').date()
+
+
+def resource_etag(resource):
+    # Serialized leases carry a status computed from today's date, so tags also roll over daily
+    return table_etag(db.session, resource.etag_tables or (resource.model.__tablename__,), date.today())
+
+
+def etag_headers(etag):
+    return {"ETag": f'"{etag}"', "Cache-Control": "private, no-cache"}
+
+
+def check_writable(resource, data):
+    """Raise ValueError when a request body sets a column clients may not write"""
+    blocked = sorted(set(data).intersection(resource.read_only_fields))
+    if blocked:
+        raise ValueError(f"Cannot set: {', '.join(blocked)}")
+
+
+def resource_expand(resource):
+    """Relationship paths to load and nest: ?expand= when given (empty for none), else the resource's default"""
+    return parse_expand(request.args.get('expand', ','.join(resource.expand)), relationship_paths(resource.model))
+
+
 class ResourceList(Resource):
     model = None
+    # Relationships nested in responses unless ?expand= names others, and how to eager-load them
+    expand = ()
+    loader_strategies = {}
+    # Columns that may be filtered on with ?<column>=<value>
+    filter_fields = ()
+    # Date columns that may be filtered on with ?<column>_from=&<column>_to= (to is exclusive)
+    date_fields = ()
+    # Non-null columns that may be sorted on with ?sort=<column> or ?sort=-<column>
+    sort_fields = ()
+    # Tables the serialized rows are built from (defaults to the model's own table)
+    etag_tables = ()
+    # Columns maintained by the server, which create and update requests may not set
+    read_only_fields = ()
     # ... (get and post methods)
 
+    def list_query(self, args, all_columns=False, expand=(), max_limit=MAX_PAGE_SIZE):
+        fields = None
+        if args.get('fields'):
+            fields = [f.strip() for f in args['fields'].split(',') if f.strip()]
+        elif all_columns:
+            fields = [column.key for column in self.model.__table__.columns]
+
+        sort_key, descending = None, False
+        if args.get('sort'):
+            sort_key = args['sort'].lstrip('-')
+            descending = args['sort'].startswith('-')
+            if sort_key not in self.sort_fields:
+                raise ValueError(f"Cannot sort by {sort_key}")
+
+        if fields:
+            unknown = [f for f in fields if f not in self.model.__table__.columns]
+            if unknown:
+                raise ValueError(f"Unknown field(s): {', '.join(unknown)}")
+            columns = [getattr(self.model, f) for f in fields]
+            for key in ('id', sort_key):
+                if key and key not in fields:
+                    columns.append(getattr(self.model, key))
+            query = db.session.query(*columns)
+        else:
+            query = self.model.query.options(*loader_options(self.model, expand, self.loader_strategies))
+
+        query = query.filter(*self.filter_criteria(args))
+
+        # Keyset pagination on (sort column, id); both always sort in the same direction
+        id_column = self.model.id
+        sort_column = getattr(self.model, sort_key) if sort_key else None
+        if args.get('after'):
+            if sort_column is not None:
+                last_value, last_id = decode_cursor(args['after'], 2)
+                try:
+                    last_value = parse_param(sort_column, last_value)
+                except ValueError:
+                    raise ValueError("Invalid cursor")
+                if descending:
+                    query = query.filter(or_(sort_column < last_value, and_(
+                        sort_column == last_value, id_column < last_id)))
+                else:
+                    query = query.filter(or_(sort_column > last_value, and_(
+                        sort_column == last_value, id_column > last_id)))
+            else:
+                (last_id,) = decode_cursor(args['after'], 1)
+                query = query.filter(id_column > last_id)
+        if sort_column is not None:
+            query = query.order_by(*((sort_column.desc(), id_column.desc()) if descending
+                                     else (sort_column, id_column)))
+        else:
+            query = query.order_by(id_column)
+        return query, fields, parse_limit(args.get('limit'), max_limit), sort_key
+
+    def filter_criteria(self, args):
+        criteria = []
+        for name in self.filter_fields:
+            if name in args:
+                column = getattr(self.model, name)
+                criteria.append(column == parse_param(column, args[name]))
+        for name in self.date_fields:
+            column = getattr(self.model, name)
+            if args.get(f'{name}_from'):
+                criteria.append(column >= parse_param(column, args[f'{name}_from']))
+            if args.get(f'{name}_to'):
+                criteria.append(column < parse_param(column, args[f'{name}_to']))
+        return criteria
+
+    def next_cursor(self, row, sort_key):
+        if sort_key:
+            return encode_cursor([json_value(getattr(row, sort_key)), row.id])
+        return encode_cursor([row.id])
+
     def get(self):
-        return [item.to_dict() for item in self.model.query.all()], 200
+        export_format = request.args.get('format')
+        if export_format:
+            return self.export(export_format)
+        etag = resource_etag(self)
+        if request.if_none_match.contains_weak(etag):
+            return make_response('', 304, etag_headers(etag))
+        try:
+            expand = resource_expand(self)
+            query, fields, limit, sort_key = self.list_query(request.args, expand=expand)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
+        if limit is not None:
+            query = query.limit(limit + 1)
+        rows = query.all()
+        headers = etag_headers(etag)
+        if limit is not None and len(rows) > limit:
+            rows = rows[:limit]
+            headers['X-Next-Cursor'] = self.next_cursor(rows[-1], sort_key)
+        with timed('serialize'):
+            if fields:
+                body = [{f: json_value(getattr(row, f)) for f in fields} for row in rows]
+            else:
+                serialize = serializer_for(self.model, expand=expand)
+                body = [serialize(item) for item in rows]
+        return body, 200, headers
+
+    def export(self, export_format):
+        if export_format not in EXPORT_MIMETYPES:
+            return make_response({"error": f"Unsupported format: {export_format}"}, 400)
+        try:
+            # Exports stream, so ?limit= is not capped at the page size
+            query, fields, limit, _ = self.list_query(request.args, all_columns=True, max_limit=None)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
+        if limit is not None:
+            query = query.limit(limit)
+        rows = query.yield_per(EXPORT_BATCH_SIZE)
+        filename = f"{self.model.__tablename__}.{export_format}"
+        return Response(stream_with_context(export_chunks(rows, fields, export_format)),
+                        mimetype=EXPORT_MIMETYPES[export_format],
+                        headers={"Content-Disposition": f"attachment; filename={filename}"})
 
     def post(self):
         data = request.get_json()
+        if isinstance(data, list):
+            return self.post_many(data)
+        try:
+            expand = resource_expand(self)
+            check_writable(self, data)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
         try:
-            for key in ['start_date', 'end_date', 'date']:
-                if key in data and data.get(key):
-                    data[key] = datetime.strptime(data[key], '%Y-%m-%d').date()
+            parse_dates(data)
             new_item = self.model(**data)
             db.session.add(new_item)
             db.session.commit()
-            return new_item.to_dict(), 201
+            return to_dict(new_item, expand=expand), 201
+        except Exception as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, 500)
+
+    def post_many(self, rows):
+        values, errors = [], []
+        for index, data in enumerate(rows):
+            try:
+                values.append(self.validated_values(data))
+            except Exception as e:
+                errors.append({"index": index, "error": str(e)})
+        if errors:
+            return make_response({"errors": errors}, 400)
+        try:
+            ids = db.session.scalars(insert(self.model).returning(
+                self.model.id, sort_by_parameter_order=True), values).all() if values else []
+            self.sync_derived(values)
+            bump_versions(db.session, [self.model.__tablename__])
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, 500)
+        return [{"index": index, "id": id} for index, id in enumerate(ids)], 201
+
+    def validated_values(self, data):
+        """Column values for a row, run through the model's constructor and @validates rules"""
+        if not isinstance(data, dict):
+            raise ValueError("Each row must be a JSON object")
+        check_writable(self, data)
+        parse_dates(data)
+        item = self.model(**data)
+        return {column.key: getattr(item, column.key) for column in self.model.__table__.columns
+                if getattr(item, column.key) is not None}
+
+    def patch(self):
+        """Set the same column values on every row selected by "ids" or "filter", in one UPDATE"""
+        data = request.get_json(silent=True)
+        try:
+            criteria = self.bulk_criteria(data)
+            changes = self.bulk_changes(data)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
+        try:
+            before = self.selected_rows(criteria)
+            rebuild = self.rollup_properties(criteria, changes)
+            result = db.session.execute(update(self.model).where(*criteria).values(changes).execution_options(
+                synchronize_session=False))
+            self.sync_bulk(before, changes)
+            self.rebuild_rollups(rebuild)
+            db.session.commit()
         except Exception as e:
             db.session.rollback()
             return make_response({"error": str(e)}, 500)
+        return {"updated": result.rowcount}, 200
+
+    def delete(self):
+        """Delete every row selected by "ids" or "filter", and the rows they own, in one transaction"""
+        data = request.get_json(silent=True)
+        try:
+            criteria = self.bulk_criteria(data)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
+        try:
+            before = self.selected_rows(criteria)
+            rebuild = self.rollup_properties(criteria)
+            counts = cascade_delete(self.model, criteria)
+            self.sync_bulk(before)
+            self.rebuild_rollups(rebuild)
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            return make_response({"error": str(e)}, 500)
+        deleted = counts.pop(self.model.__tablename__)
+        return {"deleted": deleted, "cascaded": {table: count for table, count in counts.items() if count}}, 200
+
+    def bulk_criteria(self, data):
+        """WHERE criteria for a bulk request's "ids" list or "filter" object (the list endpoint's filters)"""
+        if not isinstance(data, dict):
+            raise ValueError("Request body must be a JSON object")
+        ids, filters = data.get('ids'), data.get('filter')
+        if ids is None and not filters:
+            raise ValueError("ids or filter is required")
+        criteria = []
+        if ids is not None:
+            if not isinstance(ids, list) or not all(isinstance(id, int) for id in ids):
+                raise ValueError("ids must be a list of integers")
+            if len(ids) > MAX_BULK_IDS:
+                raise ValueError(f"At most {MAX_BULK_IDS} ids per request")
+            criteria.append(self.model.id.in_(ids))
+        if filters:
+            if not isinstance(filters, dict):
+                raise ValueError("filter must be a JSON object")
+            allowed = {*self.filter_fields, *(f'{name}_{bound}' for name in self.date_fields for bound in ('from', 'to'))}
+            unknown = sorted(set(filters) - allowed)
+            if unknown:
+                raise ValueError(f"Cannot filter by {', '.join(unknown)}")
+            criteria += self.filter_criteria({key: str(value) for key, value in filters.items()})
+        return criteria
+
+    def bulk_changes(self, data):
+        """The "changes" of a bulk PATCH, run through the model's constructor and @validates rules"""
+        changes = data.get('changes')
+        if not isinstance(changes, dict) or not changes:
+            raise ValueError("changes must be a non-empty JSON object")
+        columns = self.model.__table__.columns
+        unknown = sorted(key for key in changes if key not in columns or key == 'id')
+        if unknown:
+            raise ValueError(f"Cannot set: {', '.join(unknown)}")
+        check_writable(self, changes)
+        parse_dates(changes)
+        item = self.model(**changes)
+        return {key: getattr(item, key) for key in changes}
+
+    def selected_rows(self, criteria):
+        return [dict(row) for row in db.session.execute(select(self.model.__table__).where(*criteria)).mappings()]
+
+    def sync_derived(self, rows):
+        """Keep derived data in step with rows written outside the ORM unit of work"""
+
+    def sync_bulk(self, before, changes=None):
+        """Keep derived data in step with a set-based UPDATE (changes) or DELETE (none) of the rows in before"""
+        self.sync_derived(before + [{**row, **changes} for row in before] if changes else before)
+
+    def rollup_properties(self, criteria, changes=None):
+        """Properties whose rollups a bulk UPDATE (changes) or DELETE (none) of the selected rows invalidates"""
+        return set()
+
+    def rebuild_rollups(self, property_ids):
+        if property_ids:
+            replace_rollups(db.session.connection(), sorted(property_ids - {None}))
 
 
 class ResourceById(Resource):
     model = None
+    etag_tables = ()
+    read_only_fields = ()
+    expand = ()
+    loader_strategies = {}
     # ... (get, patch, and delete methods)
 
     def get(self, id):
-        item = db.session.get(self.model, id)
+        etag = resource_etag(self)
+        if request.if_none_match.contains_weak(etag):
+            return make_response('', 304, etag_headers(etag))
+        try:
+            expand = resource_expand(self)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
+        item = db.session.get(self.model, id, options=loader_options(self.model, expand, self.loader_strategies))
         if not item:
             return make_response({"error": f"{self.model.__name__} not found"}, 404)
-        return item.to_dict(), 200
+        with timed('serialize'):
+            body = to_dict(item, expand=expand)
+        return body, 200, etag_headers(etag)
 
     def patch(self, id):
+        try:
+            expand = resource_expand(self)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
         item = db.session.get(self.model, id)
         if not item:
             return make_response({"error": f"{self.model.__name__} not found"}, 404)
         data = request.get_json()
         try:
+            check_writable(self, data)
+        except ValueError as e:
+            return make_response({"error": str(e)}, 400)
+        try:
+            parse_dates(data)
             for attr, value in data.items():
-                if attr in ['start_date', 'end_date', 'date'] and value:
-                    value = datetime.strptime(value, '%Y-%m-%d').date()
                 setattr(item, attr, value)
             db.session.commit()
-            return item.to_dict(), 200
+            return to_dict(item, expand=expand), 200
         except Exception as e:
             db.session.rollback()
             return make_response({"error": str(e)}, 500)
@@ -265,22 +735,50 @@ class ResourceById(Resource):
 
 class PropertyList(ResourceList):
     model = Property
+    etag_tables = ('properties', 'expenses', 'units', 'leases', 'payments', 'tenants')
+    sort_fields = ('name',)
+
+    def rollup_properties(self, criteria, changes=None):
+        if changes is None:
+            return set(db.session.scalars(select(Property.id).where(*criteria)))
+        return set()
 
 
 class PropertyById(ResourceById):
     model = Property
+    etag_tables = PropertyList.etag_tables
 
 
 class UnitList(ResourceList):
     model = Unit
+    etag_tables = ('units', 'properties', 'leases', 'payments', 'tenants')
+    expand = ('property',)
+    filter_fields = ('property_id', 'status')
+    sort_fields = ('unit_number',)
+
+    def rollup_properties(self, criteria, changes=None):
+        # Units moved or deleted take their leases' payments with them
+        if changes is not None and 'property_id' not in changes:
+            return set()
+        moved_to = {changes['property_id']} if changes else set()
+        return moved_to | set(db.session.scalars(select(Unit.property_id).where(*criteria).distinct()))
 
 
 class UnitById(ResourceById):
     model = Unit
+    etag_tables = UnitList.etag_tables
+    expand = UnitList.expand
 
 
 class TenantList(ResourceList):
     model = Tenant
+    sort_fields = ('name',)
+
+    def rollup_properties(self, criteria, changes=None):
+        if changes is not None:
+            return set()
+        return set(db.session.scalars(select(Unit.property_id).join(Lease, Lease.unit_id == Unit.id).join(
+            Tenant, Tenant.id == Lease.tenant_id).where(*criteria).distinct()))
 
 
 class TenantById(ResourceById):
@@ -289,26 +787,65 @@ class TenantById(ResourceById):
 
 class LeaseList(ResourceList):
     model = Lease
+    etag_tables = ('leases', 'payments', 'tenants', 'units', 'properties')
+    expand = ('tenant', 'unit')
+    filter_fields = ('tenant_id', 'unit_id', 'status')
+    date_fields = ('start_date', 'end_date')
+    sort_fields = ('start_date', 'rent_amount', 'balance')
+    read_only_fields = tuple(LEDGER_FIELDS)
+
+    def sync_bulk(self, before, changes=None):
+        if changes and 'rent_amount' in changes:
+            refresh_ledgers(db.session, [row['id'] for row in before])
+
+    def rollup_properties(self, criteria, changes=None):
+        # Leases moved or deleted take their payments with them
+        if changes is not None and 'unit_id' not in changes:
+            return set()
+        units = Unit.id.in_(select(Lease.unit_id).where(*criteria))
+        if changes:
+            units = or_(units, Unit.id == changes['unit_id'])
+        return set(db.session.scalars(select(Unit.property_id).where(units).distinct()))
 
 
 class LeaseById(ResourceById):
     model = Lease
+    etag_tables = LeaseList.etag_tables
+    read_only_fields = LeaseList.read_only_fields
+    expand = LeaseList.expand
 
 
 class PaymentList(ResourceList):
     model = Payment
+    etag_tables = ('payments', 'leases', 'tenants', 'units', 'properties')
+    filter_fields = ('lease_id', 'method')
+    date_fields = ('date',)
+    sort_fields = ('date', 'amount')
+
+    def sync_derived(self, rows):
+        refresh_ledgers(db.session, {row['lease_id'] for row in rows})
+        refresh_rollups(db.session, payment_buckets(db.session, {(row['lease_id'], row['date']) for row in rows}))
 
 
 class PaymentById(ResourceById):
     model = Payment
+    etag_tables = PaymentList.etag_tables
 
 
 class ExpenseList(ResourceList):
     model = Expense
+    etag_tables = ('expenses', 'properties')
+    filter_fields = ('property_id', 'category')
+    date_fields = ('date',)
+    sort_fields = ('date', 'amount')
+
+    def sync_derived(self, rows):
+        refresh_rollups(db.session, expense_buckets({(row['property_id'], row['date']) for row in rows}))
 
 
 class ExpenseById(ResourceById):
     model = Expense
+    etag_tables = ExpenseList.etag_tables
 
 
 # --- API Resource Mapping (NO /api prefix) ---
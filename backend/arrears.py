@@ -0,0 +1,130 @@
+from datetime import date
+import numpy as np
+from sqlalchemy import select
+from models import db, Unit, Lease, Payment
+
+# Tables the report reads, for write-invalidated caching
+ARREARS_TABLES = ('units', 'leases', 'payments')
+# Leases listed when the request gives no limit; the totals always cover every lease
+ARREARS_PAGE_SIZE = 100
+# Upper bounds (days overdue, inclusive) of the aging buckets; anything older is 90+
+AGING_BUCKETS = (('days_0_30', 30), ('days_31_60', 60), ('days_61_90', 90))
+OLDEST_BUCKET = 'days_90_plus'
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+NAT = np.iinfo(np.int64).min
+
+
+def day_of_month(days):
+    """1-based day of the month of each datetime64[D] value"""
+    return (days - days.astype('datetime64[M]').astype('datetime64[D]')).astype(np.int64) + 1
+
+
+def installments_due(start, on):
+    """How many monthly installments of a lease starting on start fall on or before on.
+
+    Rent is due on the start date's day of the month, or the month's last day when
+    it is shorter. Both arguments are datetime64[D] arrays (or scalars) and broadcast.
+    """
+    on_month = on.astype('datetime64[M]')
+    month_days = ((on_month + 1).astype('datetime64[D]') - on_month.astype('datetime64[D]')).astype(np.int64)
+    months = (on_month - start.astype('datetime64[M]')).astype(np.int64)
+    count = months + (day_of_month(on) >= np.minimum(day_of_month(start), month_days))
+    return np.maximum(count, 0)
+
+
+def lookup(keys, wanted):
+    """Position in the sorted keys of each wanted key, and a mask of the keys that are present"""
+    if not len(keys):
+        return np.zeros(len(wanted), dtype=np.int64), np.zeros(len(wanted), dtype=bool)
+    index = np.minimum(np.searchsorted(keys, wanted), len(keys) - 1)
+    return index, keys[index] == wanted
+
+
+def columns(result, width):
+    """A query result transposed into one tuple per column; fetching everything at once is much faster"""
+    return list(zip(*result.all())) or [()] * width
+
+
+def date_array(values):
+    """datetime64[D] array of dates (NaT for NULLs), built from ordinals, which is far faster than numpy's parser"""
+    # NaT is stored as the smallest int64
+    ordinals = [value.toordinal() - EPOCH_ORDINAL if value is not None else NAT for value in values]
+    return np.array(ordinals, dtype=np.int64).astype('datetime64[D]')
+
+
+def load_leases(as_of, *criteria, property_id=None):
+    """Leases matching the criteria as column arrays, with what was paid against each on or before as_of.
+
+    Paid amounts start from the ledger's total_paid and take off payments dated after
+    as_of, which only means reading a short tail of the payments' date index. An
+    open-ended lease has an end of NaT.
+    """
+    leases_query = select(
+        Lease.id, Lease.tenant_id, Lease.unit_id, Unit.property_id, Lease.start_date, Lease.end_date,
+        Lease.rent_amount, Lease.total_paid,
+    ).join(Unit, Lease.unit_id == Unit.id).where(*criteria).order_by(Lease.id)
+    if property_id is not None:
+        leases_query = leases_query.where(Unit.property_id == property_id)
+
+    connection = db.session.connection()
+    ids, tenant_ids, unit_ids, property_ids, starts, ends, rents, paid = columns(connection.execute(leases_query), 8)
+    ids, tenant_ids, unit_ids, property_ids = (
+        np.array(column, dtype=np.int64) for column in (ids, tenant_ids, unit_ids, property_ids))
+    rents, paid = np.array(rents, dtype=np.float64), np.array(paid, dtype=np.float64)
+
+    later_leases, later_amounts = columns(connection.execute(
+        select(Payment.lease_id, Payment.amount).where(Payment.date > as_of)), 2)
+    later_leases, later_amounts = np.array(later_leases, dtype=np.int64), np.array(later_amounts, dtype=np.float64)
+    index, found = lookup(ids, later_leases)
+    np.subtract.at(paid, index[found], later_amounts[found])
+
+    return {"id": ids, "tenant_id": tenant_ids, "unit_id": unit_ids, "property_id": property_ids,
+            "start": date_array(starts), "end": date_array(ends), "rent": rents, "paid": paid}
+
+
+def arrears(leases, as_of):
+    """Accrued rent, payments and aged arrears for every lease at once.
+
+    Payments settle the oldest installments first, so what is still owed is the
+    most recent installments; an installment's age is the days since it fell due.
+    """
+    today = np.datetime64(as_of, 'D')
+    # fmin ignores NaT, so an open-ended lease accrues up to as_of
+    due_by = np.fmin(leases["end"], today)
+    periods = installments_due(leases["start"], due_by)
+    accrued = periods * leases["rent"]
+    owed = np.maximum(accrued - leases["paid"], 0)
+
+    buckets, covered = {}, np.zeros(len(owed))
+    for name, days in AGING_BUCKETS:
+        # Installments that fell due within the last `days` days, capped at what is owed
+        recent = periods - installments_due(leases["start"], np.minimum(due_by, today - days - 1))
+        within = np.minimum(owed, recent * leases["rent"])
+        buckets[name] = within - covered
+        covered = within
+    buckets[OLDEST_BUCKET] = owed - covered
+
+    return {"periods_due": periods, "accrued": accrued, "paid": leases["paid"], "arrears": owed, **buckets}
+
+
+def arrears_report(as_of, property_id=None, limit=ARREARS_PAGE_SIZE):
+    """Portfolio arrears at as_of: totals, aging buckets and the leases in arrears, largest first"""
+    leases = load_leases(as_of, Lease.start_date <= as_of, property_id=property_id)
+    result = arrears(leases, as_of)
+    amounts = ["accrued", "paid", "arrears", *(name for name, _ in AGING_BUCKETS), OLDEST_BUCKET]
+
+    in_arrears = np.flatnonzero(result["arrears"] > 0.005)
+    in_arrears = in_arrears[np.argsort(-result["arrears"][in_arrears], kind='stable')]
+    in_arrears = in_arrears[:limit]
+
+    rows = {"lease_id": leases["id"][in_arrears].tolist(), "property_id": leases["property_id"][in_arrears].tolist(),
+            "rent_amount": leases["rent"][in_arrears].tolist(),
+            "periods_due": result["periods_due"][in_arrears].tolist()}
+    rows.update({name: np.round(result[name][in_arrears], 2).tolist() for name in amounts})
+    return {
+        "as_of": as_of.isoformat(),
+        "lease_count": len(leases["id"]),
+        "leases_in_arrears": int(np.count_nonzero(result["arrears"] > 0.005)),
+        "totals": {name: round(float(result[name].sum()), 2) for name in amounts},
+        "leases": [dict(zip(rows, values)) for values in zip(*rows.values())],
+    }
@@ -0,0 +1,214 @@
+"""Latency, query count and peak memory of every GET route and the main write paths, compared against a baseline.
+
+Builds each dataset size with seed.generate_database() in a scratch SQLite file,
+then drives the report endpoints, every ResourceList / ResourceById route, a
+payment POST and a bulk payment PATCH through the Flask test client. The
+response cache is cleared before every request so each measurement recomputes
+the response. The writes run after every GET, so they cannot skew the reads.
+
+    python benchmarks/endpoints.py --sizes small,medium               # compare with baseline.json
+    python benchmarks/endpoints.py --sizes small,medium --update-baseline
+
+Exits with status 1 when a route is slower (p50), issues more queries or
+allocates more than the baseline allows. The baseline records the --seed and
+--as-of its datasets were generated with; sizes generated differently are not
+compared.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import date
+from sqlalchemy import event
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# generate_database() arguments per dataset size
+SIZES = {
+    'small': dict(properties=10, units_per_property=5, years=1),
+    'medium': dict(properties=100, units_per_property=10, years=3),
+    'large': dict(properties=1000, units_per_property=20, years=5),
+}
+
+# Latency changes smaller than this are treated as noise whatever the threshold
+NOISE_FLOOR_MS = 1.0
+
+
+def percentile(samples, fraction):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def routes(app, list_limit, as_of):
+    """URLs for the report endpoints and every list/item resource, with report dates pinned to as_of"""
+    from app import ResourceList, ResourceById
+    from models import db
+
+    year = as_of.year
+    urls = ["/dashboard_summary",
+            f"/reports/property_financials?property_id=all&year={year}",
+            f"/reports/property_financials?property_id=1&year={year}",
+            f"/reports/property_financials?property_id=all&from={year - 1}-01-15&to={year}-06-15&granularity=quarter",
+            f"/reports/arrears?as_of={as_of}", f"/reports/rent_roll?from={as_of:%Y-%m}", "/search?q=road"]
+    query = f"?limit={list_limit}" if list_limit else ""
+    with app.app_context():
+        for rule in app.url_map.iter_rules():
+            view_class = getattr(app.view_functions[rule.endpoint], 'view_class', None)
+            if view_class is None:
+                continue
+            if issubclass(view_class, ResourceList):
+                urls.append(rule.rule + query)
+            elif issubclass(view_class, ResourceById):
+                first_id = db.session.query(db.func.min(view_class.model.id)).scalar()
+                if first_id is not None:
+                    urls.append(rule.rule.replace('<int:id>', str(first_id)))
+    return urls
+
+
+def write_routes(app, as_of):
+    """(name, method, url, body) of each write path measured"""
+    from models import db, Lease, Payment
+
+    with app.app_context():
+        lease_id = db.session.query(db.func.min(Lease.id)).scalar()
+        payment_ids = db.session.scalars(db.select(Payment.id).order_by(Payment.id).limit(100)).all()
+    return [
+        ("POST /payments", "POST", "/payments", {"lease_id": lease_id, "amount": 1, "date": str(as_of)}),
+        # Moves 100 payments in time, so the ledger and both rollup tables get rewritten
+        ("PATCH /payments (100 ids)", "PATCH", "/payments", {"ids": payment_ids, "changes": {"date": str(as_of)}}),
+    ]
+
+
+def measure(app, url, iterations, method="GET", body=None):
+    from cache import response_cache
+    from models import db
+
+    queries = [0]
+
+    def count(*args):
+        queries[0] += 1
+
+    with app.app_context():
+        engine = db.engine
+    client = app.test_client()
+    samples = []
+    event.listen(engine, 'before_cursor_execute', count)
+    try:
+        for i in range(iterations + 1):
+            response_cache.store.clear()
+            queries[0] = 0
+            started = time.perf_counter()
+            response = client.open(url, method=method, json=body)
+            elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code not in (200, 201):
+                raise RuntimeError(f"{method} {url} returned {response.status_code}: {response.data[:200]}")
+            if i:  # the first request warms caches and compiled serializers
+                samples.append(elapsed)
+    finally:
+        event.remove(engine, 'before_cursor_execute', count)
+
+    # tracemalloc slows everything down, so peak memory gets its own request
+    response_cache.store.clear()
+    tracemalloc.start()
+    client.open(url, method=method, json=body)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+
+    return {"p50_ms": round(statistics.median(samples), 3), "p95_ms": round(percentile(samples, 0.95), 3),
+            "p99_ms": round(percentile(samples, 0.99), 3), "queries": queries[0], "peak_kb": round(peak / 1024, 1)}
+
+
+def regressions(results, baseline, threshold):
+    """Human-readable list of metrics that got worse than baseline * (1 + threshold)"""
+    found = []
+    for size, by_url in results.items():
+        for url, now in by_url.items():
+            before = baseline.get(size, {}).get(url)
+            if before is None:
+                continue
+            if now["p50_ms"] > before["p50_ms"] * (1 + threshold) and now["p50_ms"] - before["p50_ms"] > NOISE_FLOOR_MS:
+                found.append(f"[{size}] {url}: p50 {before['p50_ms']}ms -> {now['p50_ms']}ms")
+            if now["queries"] > before["queries"]:
+                found.append(f"[{size}] {url}: queries {before['queries']} -> {now['queries']}")
+            if now["peak_kb"] > before["peak_kb"] * (1 + threshold):
+                found.append(f"[{size}] {url}: peak memory {before['peak_kb']}KB -> {now['peak_kb']}KB")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='small', help=f"comma-separated dataset sizes ({', '.join(SIZES)})")
+    parser.add_argument('--iterations', type=int, default=20, help='timed requests per route')
+    parser.add_argument('--list-limit', type=int, default=100, help='?limit= for list routes (0 = unpaginated)')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='baseline JSON file')
+    parser.add_argument('--threshold', type=float, default=0.25, help='allowed slowdown, 0.25 = 25%%')
+    parser.add_argument('--update-baseline', action='store_true', help='write the results as the new baseline')
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--as-of', type=date.fromisoformat, help='YYYY-MM-DD the generated data ends on (default seed.py\'s)')
+    args = parser.parse_args()
+
+    sizes = [size.strip() for size in args.sizes.split(',') if size.strip()]
+    unknown = [size for size in sizes if size not in SIZES]
+    if unknown:
+        parser.error(f"unknown size(s): {', '.join(unknown)}")
+
+    scratch = tempfile.TemporaryDirectory()
+    os.environ['DB_URI'] = f"sqlite:///{os.path.join(scratch.name, 'bench.db')}"
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+    from models import db
+    from seed import DEFAULT_AS_OF, generate_database
+    with app.app_context():
+        db.create_all()
+
+    as_of = args.as_of or DEFAULT_AS_OF
+    results, datasets = {}, {}
+    for size in sizes:
+        datasets[size] = dict(SIZES[size], seed=args.seed, as_of=str(as_of))
+        generate_database(seed=args.seed, as_of=as_of, **SIZES[size])
+        results[size] = {}
+        print(f"\n{size}: {'route':70} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>7} {'peak KB':>9}")
+        requests = [(url, "GET", url, None) for url in routes(app, args.list_limit, as_of)] + write_routes(app, as_of)
+        for name, method, url, body in requests:
+            row = results[size][name] = measure(app, url, args.iterations, method, body)
+            print(f"  {name:76} {row['p50_ms']:>8.2f} {row['p95_ms']:>8.2f} {row['p99_ms']:>8.2f} "
+                  f"{row['queries']:>7} {row['peak_kb']:>9.1f}")
+    scratch.cleanup()
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+
+    if args.update_baseline:
+        baseline.update(results)
+        baseline.setdefault('datasets', {}).update(datasets)
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+        print(f"\nWrote baseline for {', '.join(sizes)} to {args.baseline}")
+        return
+
+    if not baseline:
+        print(f"\nNo baseline at {args.baseline}; run with --update-baseline to record one.")
+        return
+    for size in sizes:
+        recorded = baseline.get('datasets', {}).get(size)
+        if recorded != datasets[size]:
+            print(f"\n[{size}] baseline was generated with {recorded}, not {datasets[size]}; skipping it.")
+            results.pop(size)
+    found = regressions(results, baseline, args.threshold)
+    if found:
+        print(f"\n{len(found)} regression(s) beyond {args.threshold:.0%}:")
+        for line in found:
+            print(f"  {line}")
+        sys.exit(1)
+    print(f"\nNo regressions beyond {args.threshold:.0%}.")
+
+
+if __name__ == '__main__':
+    main()
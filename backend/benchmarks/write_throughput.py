@@ -0,0 +1,114 @@
+"""Concurrent write throughput of POST /payments under different engine settings.
+
+Each configuration gets a fresh SQLite file. Several worker processes (standing in
+for gunicorn workers) import the app with that configuration's environment and
+post payments as fast as they can; the table reports committed writes per second
+and how many requests failed (typically "database is locked").
+
+    python benchmarks/write_throughput.py --workers 4 --writes 200
+    DB_URI=postgresql://... python benchmarks/write_throughput.py --config env
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Environment overrides per configuration; "env" runs against whatever DB_URI is set
+CONFIGS = {
+    'rollback-journal': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_BUSY_TIMEOUT_MS': '0',
+                         'SQLITE_SYNCHRONOUS': 'FULL', 'SQLITE_CACHE_SIZE': '', 'SQLITE_MMAP_SIZE': ''},
+    'rollback-journal+busy-timeout': {'SQLITE_JOURNAL_MODE': 'DELETE', 'SQLITE_SYNCHRONOUS': 'FULL'},
+    'wal': {'SQLITE_BUSY_TIMEOUT_MS': '0'},
+    'wal+busy-timeout': {},
+    'env': None,
+}
+
+
+def load_app(environ):
+    os.environ.update(environ)
+    sys.path.insert(0, BACKEND_DIR)
+    from app import app
+    return app
+
+
+def prepare(environ):
+    """Create the schema and one lease to post payments against"""
+    app = load_app(environ)
+    from models import db, Property, Unit, Tenant, Lease
+    from datetime import date
+    with app.app_context():
+        db.create_all()
+        prop = Property(name="Bench", address="Bench")
+        unit = Unit(unit_number="B1", property=prop, status="occupied")
+        tenant = Tenant(name="Bench", contact="bench@example.com")
+        lease = Lease(tenant=tenant, unit=unit, start_date=date(2026, 1, 1),
+                      end_date=date(2026, 12, 31), rent_amount=1000000)
+        db.session.add_all([prop, unit, tenant, lease])
+        db.session.commit()
+        return lease.id
+
+
+def writer(environ, lease_id, writes, start_at, results):
+    app = load_app(environ)
+    client = app.test_client()
+    while time.time() < start_at:
+        time.sleep(0.001)
+    ok = failed = 0
+    started = time.perf_counter()
+    for i in range(writes):
+        response = client.post("/payments", json={
+            "lease_id": lease_id, "amount": 1, "date": f"2026-{i % 12 + 1:02d}-01"})
+        if response.status_code == 201:
+            ok += 1
+        else:
+            failed += 1
+    results.put((ok, failed, started, time.perf_counter()))
+
+
+def run(name, overrides, workers, writes):
+    with tempfile.TemporaryDirectory() as tmp:
+        environ = dict(overrides or {})
+        if overrides is not None:
+            environ['DB_URI'] = f"sqlite:///{os.path.join(tmp, 'bench.db')}"
+        ctx = multiprocessing.get_context('spawn')
+        setup = ctx.Pool(1)
+        lease_id = setup.apply(prepare, (environ,))
+        setup.close()
+
+        results = ctx.Queue()
+        start_at = time.time() + 2  # give every worker time to import the app
+        procs = [ctx.Process(target=writer, args=(environ, lease_id, writes, start_at, results))
+                 for _ in range(workers)]
+        for proc in procs:
+            proc.start()
+        outcomes = [results.get() for _ in procs]
+        for proc in procs:
+            proc.join()
+
+    ok = sum(o[0] for o in outcomes)
+    failed = sum(o[1] for o in outcomes)
+    elapsed = max(o[3] for o in outcomes) - min(o[2] for o in outcomes)
+    return {"config": name, "ok": ok, "failed": failed, "seconds": elapsed, "writes_per_sec": ok / elapsed}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--workers', type=int, default=4, help='concurrent writer processes')
+    parser.add_argument('--writes', type=int, default=200, help='payments posted per worker')
+    parser.add_argument('--config', action='append', choices=sorted(CONFIGS),
+                        help='configuration(s) to run (default: all SQLite ones)')
+    args = parser.parse_args()
+
+    names = args.config or [name for name in CONFIGS if name != 'env']
+    print(f"{'config':32} {'ok':>7} {'failed':>7} {'seconds':>8} {'writes/s':>9}")
+    for name in names:
+        row = run(name, CONFIGS[name], args.workers, args.writes)
+        print(f"{row['config']:32} {row['ok']:>7} {row['failed']:>7} {row['seconds']:>8.2f} {row['writes_per_sec']:>9.1f}")
+
+
+if __name__ == '__main__':
+    main()
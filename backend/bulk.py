@@ -0,0 +1,23 @@
+from sqlalchemy import delete, select
+from sqlalchemy.orm import RelationshipDirection
+from models import db
+
+# Ids one bulk PATCH or DELETE may name; each is bound as its own SQL parameter
+MAX_BULK_IDS = 10000
+
+
+def cascade_delete(model, criteria, counts=None):
+    """Delete the rows of model matching criteria, after the rows they own, one DELETE per table.
+
+    Follows the models' cascade="all, delete-orphan" relationships like a session
+    delete would, so nothing depends on the database enforcing foreign keys.
+    Returns how many rows went from each table.
+    """
+    counts = {} if counts is None else counts
+    for relationship in model.__mapper__.relationships:
+        if relationship.cascade.delete and relationship.direction is RelationshipDirection.ONETOMANY:
+            ((parent_key, child_key),) = relationship.local_remote_pairs
+            cascade_delete(relationship.mapper.class_, [child_key.in_(select(parent_key).where(*criteria))], counts)
+    result = db.session.execute(delete(model).where(*criteria).execution_options(synchronize_session=False))
+    counts[model.__tablename__] = counts.get(model.__tablename__, 0) + result.rowcount
+    return counts
@@ -0,0 +1,138 @@
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from models import db
+from versions import current_versions
+
+DEFAULT_CACHE_SIZE = 256
+
+
+class MemoryStore:
+    """Size-bounded LRU dict local to this process"""
+    name = 'memory'
+
+    def __init__(self, max_entries):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key):
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def set(self, key, value):
+        """Store value and return how many entries were evicted to make room"""
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            evicted = 0
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+                evicted += 1
+            return evicted
+
+    def __len__(self):
+        with self.lock:
+            return len(self.entries)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+class SQLiteStore:
+    """Size-bounded LRU table in a SQLite file, shared by every worker process on the host"""
+    name = 'sqlite'
+
+    def __init__(self, path, max_entries):
+        self.path = path
+        self.max_entries = max_entries
+        with self.connect() as conn:
+            conn.execute("CREATE TABLE IF NOT EXISTS response_cache "
+                         "(key TEXT PRIMARY KEY, value TEXT NOT NULL, used REAL NOT NULL)")
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_response_cache_used ON response_cache (used)")
+
+    def connect(self):
+        return sqlite3.connect(self.path, timeout=5)
+
+    def get(self, key):
+        with self.connect() as conn:
+            row = conn.execute("SELECT value FROM response_cache WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("UPDATE response_cache SET used = ? WHERE key = ?", (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key, value):
+        with self.connect() as conn:
+            conn.execute("INSERT OR REPLACE INTO response_cache (key, value, used) VALUES (?, ?, ?)",
+                         (key, json.dumps(value), time.time()))
+            return conn.execute("DELETE FROM response_cache WHERE key IN (SELECT key FROM response_cache "
+                                "ORDER BY used DESC LIMIT -1 OFFSET ?)", (self.max_entries,)).rowcount
+
+    def __len__(self):
+        with self.connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM response_cache").fetchone()[0]
+
+    def clear(self):
+        with self.connect() as conn:
+            conn.execute("DELETE FROM response_cache")
+
+
+class ResponseCache:
+    """Caches computed response bodies until a table they were computed from is written.
+
+    Every key embeds the current generation counters of its tables, so a write
+    (which advances the counters in its own transaction) makes older entries
+    unreachable; LRU eviction reclaims them.
+    """
+
+    def __init__(self, app=None):
+        self.store = None
+        self.hits = self.misses = self.evictions = 0
+        # += on an attribute is not atomic, and threaded workers share this object
+        self.counter_lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        max_entries = app.config.setdefault('RESPONSE_CACHE_SIZE', DEFAULT_CACHE_SIZE)
+        path = app.config.setdefault('RESPONSE_CACHE_PATH', None)
+        self.store = SQLiteStore(path, max_entries) if path else MemoryStore(max_entries)
+
+    def fetch(self, key, tables, compute):
+        """Return the cached result for key, calling compute() on a miss"""
+        # Read the counters before computing so a concurrent write can only make the entry fresher
+        cache_key = json.dumps([key, tables, current_versions(db.session, tables)], default=str)
+        value = self.store.get(cache_key)
+        if value is not None:
+            self.count(hits=1)
+            return value
+        self.count(misses=1)
+        value = compute()
+        self.count(evictions=self.store.set(cache_key, value))
+        return value
+
+    def count(self, hits=0, misses=0, evictions=0):
+        with self.counter_lock:
+            self.hits += hits
+            self.misses += misses
+            self.evictions += evictions
+
+    def stats(self):
+        with self.counter_lock:
+            hits, misses, evictions = self.hits, self.misses, self.evictions
+        lookups = hits + misses
+        return {
+            "backend": self.store.name, "entries": len(self.store), "max_entries": self.store.max_entries,
+            "hits": hits, "misses": misses, "evictions": evictions,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0
+        }
+
+
+response_cache = ResponseCache()
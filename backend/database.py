@@ -0,0 +1,61 @@
+import os
+from sqlalchemy import event
+from sqlalchemy.engine import make_url
+
+# Applied to every new SQLite connection. WAL lets readers run alongside the single
+# writer, and busy_timeout makes writers wait for the lock instead of failing with
+# "database is locked".
+SQLITE_PRAGMAS = {
+    'journal_mode': ('SQLITE_JOURNAL_MODE', 'WAL'),
+    'busy_timeout': ('SQLITE_BUSY_TIMEOUT_MS', '5000'),
+    'synchronous': ('SQLITE_SYNCHRONOUS', 'NORMAL'),
+    'cache_size': ('SQLITE_CACHE_SIZE', '-20000'),  # negative = KiB, so ~20 MB
+    'mmap_size': ('SQLITE_MMAP_SIZE', '268435456'),
+}
+
+POOL_OPTIONS = {
+    'pool_size': ('DB_POOL_SIZE', 5),
+    'max_overflow': ('DB_MAX_OVERFLOW', 10),
+    'pool_timeout': ('DB_POOL_TIMEOUT', 30),
+    'pool_recycle': ('DB_POOL_RECYCLE', 1800),
+}
+
+
+def database_uri(default, environ=os.environ):
+    """DB_URI from the environment, with Heroku/Render style postgres:// URLs normalized"""
+    uri = environ.get('DB_URI') or default
+    if uri.startswith('postgres://'):
+        uri = 'postgresql://' + uri[len('postgres://'):]
+    return uri
+
+
+def engine_options(uri, environ=os.environ):
+    """SQLALCHEMY_ENGINE_OPTIONS for the given database URI"""
+    url = make_url(uri)
+    options = {'pool_pre_ping': environ.get('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')}
+    if url.get_backend_name() == 'sqlite' and url.database in (None, '', ':memory:'):
+        return options  # in-memory databases use a single shared connection
+    for option, (name, default) in POOL_OPTIONS.items():
+        options[option] = int(environ.get(name, default))
+    return options
+
+
+def sqlite_pragmas(environ=os.environ):
+    return {pragma: environ.get(name, default) for pragma, (name, default) in SQLITE_PRAGMAS.items()}
+
+
+def init_engine(app, db):
+    """Apply the SQLite pragmas to each connection the app's engine opens"""
+    with app.app_context():
+        engine = db.engine
+    if engine.dialect.name != 'sqlite':
+        return
+    pragmas = app.config.get('SQLITE_PRAGMAS') or {}
+
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in pragmas.items():
+            if value not in (None, ''):
+                cursor.execute(f"PRAGMA {pragma}={value}")
+        cursor.close()
@@ -0,0 +1,41 @@
+import csv
+import io
+import json
+from querying import json_value
+
+EXPORT_BATCH_SIZE = 1000
+EXPORT_MIMETYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv',
+}
+
+
+def export_chunks(rows, fields, export_format):
+    """Yield the rows of a column query as NDJSON or CSV, one chunk per batch.
+
+    The CSV header and the first row go out on their own so clients see the
+    download start before a whole batch has been read.
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer) if export_format == 'csv' else None
+    if writer:
+        writer.writerow(fields)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    count = 0
+    for row in rows:
+        values = [json_value(getattr(row, f)) for f in fields]
+        if writer:
+            writer.writerow(values)
+        else:
+            buffer.write(json.dumps(dict(zip(fields, values))))
+            buffer.write('\n')
+        count += 1
+        if count == 1 or count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
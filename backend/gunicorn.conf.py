@@ -0,0 +1,10 @@
+import os
+
+# Threaded workers, so one process serves several requests at once. The password
+# hashing pool (passwords.py) and the report job queue (jobs.py) bound work per
+# process; under sync workers each process only ever has one request in flight and
+# those limits never apply. Keep threads within the database pool (DB_POOL_SIZE +
+# DB_MAX_OVERFLOW).
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', 2))
+threads = int(os.environ.get('GUNICORN_THREADS', 8))
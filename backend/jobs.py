@@ -0,0 +1,72 @@
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from cache import MemoryStore, SQLiteStore
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobRunner:
+    """Runs report computations on a bounded thread pool, off the request path.
+
+    Job records (status, then result or error) live in a store shared the same way
+    as the response cache: in-process by default, or a SQLite file so any worker can
+    answer a poll. Finished records expire after REPORT_JOB_TTL seconds.
+    """
+
+    def __init__(self, app=None):
+        self.app = None
+        self.executor = None
+        self.store = None
+        self.pending = 0
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.app = app
+        workers = app.config.setdefault('REPORT_JOB_WORKERS', 2)
+        self.max_pending = app.config.setdefault('REPORT_JOB_QUEUE_SIZE', 16)
+        self.ttl = app.config.setdefault('REPORT_JOB_TTL', 600)
+        history = app.config.setdefault('REPORT_JOB_HISTORY', 1000)
+        path = app.config.setdefault('REPORT_JOB_STORE_PATH', None)
+        self.store = SQLiteStore(path, history) if path else MemoryStore(history)
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='report-job')
+
+    def submit(self, report, params, compute):
+        """Queue compute() and return the new job record; raises JobQueueFull when saturated"""
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise JobQueueFull(f"{self.pending} report jobs already queued or running")
+            self.pending += 1
+        job = {"id": uuid.uuid4().hex, "report": report, "params": params, "status": "queued",
+               "created_at": time.time(), "finished_at": None}
+        self.store.set(job["id"], job)
+        self.executor.submit(self._run, dict(job), compute)
+        return job
+
+    def get(self, job_id):
+        job = self.store.get(job_id)
+        if job is None or (job["finished_at"] is not None and time.time() - job["finished_at"] > self.ttl):
+            return None
+        return job
+
+    def _run(self, job, compute):
+        try:
+            self.store.set(job["id"], {**job, "status": "running"})
+            try:
+                with self.app.app_context():
+                    job.update(status="done", result=compute())
+            except Exception as e:
+                job.update(status="failed", error=str(e))
+            job["finished_at"] = time.time()
+            self.store.set(job["id"], job)
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+
+report_jobs = JobRunner()
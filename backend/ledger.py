@@ -0,0 +1,103 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import event, func, inspect, select, update
+from sqlalchemy.orm import Session
+from models import db, Lease, Payment
+from versions import bump_versions
+
+LEDGER_FIELDS = ['total_paid', 'balance', 'last_payment_date']
+
+leases = Lease.__table__
+payments = Payment.__table__
+
+
+def refresh_ledgers(session, lease_ids=None):
+    """Recompute the ledger columns of the given leases (all when None) from their payments"""
+    total_paid = select(func.coalesce(func.sum(payments.c.amount), 0)).where(
+        payments.c.lease_id == leases.c.id).scalar_subquery()
+    last_payment_date = select(func.max(payments.c.date)).where(
+        payments.c.lease_id == leases.c.id).scalar_subquery()
+    stmt = update(leases).values(
+        total_paid=total_paid,
+        balance=leases.c.rent_amount - total_paid,
+        last_payment_date=last_payment_date)
+    lock = select(leases.c.id).order_by(leases.c.id).with_for_update()
+    if lease_ids is not None:
+        lease_ids = set(lease_ids)
+        if not lease_ids:
+            return
+        stmt = stmt.where(leases.c.id.in_(lease_ids))
+        lock = lock.where(leases.c.id.in_(lease_ids))
+    # Under READ COMMITTED the sums would otherwise come from a snapshot taken before a
+    # concurrent payment to the same lease committed, and overwrite its total. Once the
+    # rows are locked the UPDATE runs with a fresh snapshot. SQLite serializes writers anyway.
+    connection = session.connection()
+    if connection.dialect.name != 'sqlite':
+        connection.execute(lock)
+    connection.execute(stmt)
+
+    for obj in list(session.identity_map.values()):
+        if isinstance(obj, Lease) and (lease_ids is None or obj.id in lease_ids):
+            session.expire(obj, LEDGER_FIELDS)
+
+
+# --- Keep the ledger in step with ORM writes to payments ---
+
+@event.listens_for(Session, "after_flush")
+def _collect_payment_leases(session, flush_context):
+    touched = session.info.setdefault('ledger_lease_ids', set())
+    for obj in session.new | session.dirty | session.deleted:
+        if not isinstance(obj, Payment):
+            continue
+        history = inspect(obj).attrs.lease_id.history
+        touched.update(lease_id for lease_id in (*history.added, *history.unchanged, *history.deleted)
+                       if lease_id is not None)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _apply_payment_leases(session, flush_context):
+    touched = session.info.pop('ledger_lease_ids', None)
+    if touched:
+        refresh_ledgers(session, touched)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_payment_leases(session):
+    session.info.pop('ledger_lease_ids', None)
+
+
+# --- CLI: flask ledger rebuild / flask ledger verify ---
+
+ledger_cli = AppGroup('ledger', help='Maintain the per-lease payment ledger.')
+
+
+@ledger_cli.command('rebuild')
+def rebuild_command():
+    """Recompute every lease's ledger from the payments table"""
+    refresh_ledgers(db.session)
+    # Cached reports and ETags built from the old ledger go stale with it
+    bump_versions(db.session, ['leases'])
+    db.session.commit()
+    click.echo(f"Rebuilt ledger for {Lease.query.count()} leases.")
+
+
+@ledger_cli.command('verify')
+def verify_command():
+    """Compare stored ledgers against the payments table"""
+    paid = select(payments.c.lease_id, func.sum(payments.c.amount).label('total_paid'),
+                  func.max(payments.c.date).label('last_payment_date')).group_by(payments.c.lease_id).subquery()
+    rows = db.session.execute(select(
+        leases.c.id, leases.c.rent_amount, leases.c.total_paid, leases.c.balance, leases.c.last_payment_date,
+        func.coalesce(paid.c.total_paid, 0), paid.c.last_payment_date
+    ).outerjoin(paid, paid.c.lease_id == leases.c.id)).all()
+
+    mismatches = 0
+    for lease_id, rent, total_paid, balance, last_date, actual_paid, actual_last_date in rows:
+        if (abs(total_paid - actual_paid) > 0.005 or abs(balance - (rent - actual_paid)) > 0.005
+                or last_date != actual_last_date):
+            mismatches += 1
+            click.echo(f"Lease {lease_id}: stored paid={total_paid} balance={balance} last={last_date}, "
+                       f"expected paid={actual_paid} balance={rent - actual_paid} last={actual_last_date}")
+    click.echo(f"Checked {len(rows)} leases, {mismatches} mismatched.")
+    if mismatches:
+        raise SystemExit(1)
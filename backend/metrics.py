@@ -0,0 +1,153 @@
+import threading
+import time
+from contextlib import contextmanager
+from flask import Response, g, has_app_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import CursorResult, Engine
+from sqlalchemy.orm import Session
+
+# Upper bounds (seconds) of the request latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+
+def current():
+    """This request's counters, or None outside an instrumented request"""
+    return g.get('request_metrics') if has_app_context() else None
+
+
+@contextmanager
+def timed(phase):
+    """Add the wall time of the block, minus any SQL time inside it, to this request's phase total"""
+    stats = current()
+    if stats is None:
+        yield
+        return
+    started, db_before = time.perf_counter(), stats['db']
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started - (stats['db'] - db_before)
+        stats[phase] = stats.get(phase, 0) + elapsed
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    if context is not None:
+        context._metrics_started = time.perf_counter()
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    stats = current()
+    if stats is not None and context is not None and hasattr(context, '_metrics_started'):
+        stats['queries'] += 1
+        # Inside a session SELECT the whole fetch is timed by _time_session_select instead
+        if not g.get('metrics_in_select'):
+            stats['db'] += time.perf_counter() - context._metrics_started
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _time_session_select(orm_execute_state):
+    """Run a session query to its last row under the db timer, so row fetching and ORM loading count as db time.
+
+    Streamed (yield_per / stream_results) queries are left alone; they fetch as
+    they are consumed, and only their execution is timed.
+    """
+    state, options = orm_execute_state, orm_execute_state.execution_options
+    if (current() is None or state.is_insert or state.is_update or state.is_delete or g.get('metrics_in_select')
+            or options.get('yield_per') or options.get('stream_results')):
+        return None
+    g.metrics_in_select = True
+    started = time.perf_counter()
+    try:
+        result = state.invoke_statement()
+        # A text() statement may be DML, which has no rows to fetch
+        if isinstance(result, CursorResult) and not result.returns_rows:
+            return result
+        frozen = result.freeze()
+    finally:
+        g.metrics_in_select = False
+        current()['db'] += time.perf_counter() - started
+    return frozen()
+
+
+class Metrics:
+    """Per-request SQL/serialization/bcrypt timings and per-endpoint latency histograms.
+
+    Each request gets a Server-Timing header; /metrics serves the process-wide
+    totals in the Prometheus text format (one set per worker process).
+    """
+
+    def __init__(self, app=None):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        if not app.config.setdefault('METRICS_ENABLED', True):
+            return
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        app.add_url_rule('/metrics', 'metrics', self.render)
+
+    def _start_request(self):
+        g.request_metrics = {'started': time.perf_counter(), 'queries': 0, 'db': 0.0}
+
+    def _finish_request(self, response):
+        stats = g.pop('request_metrics', None)
+        if stats is None:
+            return response
+        total = time.perf_counter() - stats['started']
+        phases = {name: value for name, value in stats.items() if name not in ('started', 'queries')}
+
+        timings = [f'db;dur={stats["db"] * 1000:.2f};desc="{stats["queries"]} queries"']
+        timings += [f'{name};dur={value * 1000:.2f}' for name, value in phases.items() if name != 'db']
+        timings.append(f'total;dur={total * 1000:.2f}')
+        response.headers['Server-Timing'] = ', '.join(timings)
+
+        rule = request.url_rule.rule if request.url_rule else 'unmatched'
+        key = (rule, request.method)
+        with self.lock:
+            endpoint = self.endpoints.get(key)
+            if endpoint is None:
+                endpoint = self.endpoints[key] = {'buckets': [0] * len(LATENCY_BUCKETS), 'count': 0,
+                                                  'sum': 0.0, 'queries': 0, 'phases': {}}
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if total <= bound:
+                    endpoint['buckets'][i] += 1
+            endpoint['count'] += 1
+            endpoint['sum'] += total
+            endpoint['queries'] += stats['queries']
+            for name, value in phases.items():
+                endpoint['phases'][name] = endpoint['phases'].get(name, 0) + value
+        return response
+
+    def render(self):
+        lines = [
+            "# HELP http_request_duration_seconds Request latency by endpoint.",
+            "# TYPE http_request_duration_seconds histogram",
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for (rule, method), endpoint in endpoints:
+                labels = f'endpoint="{rule}",method="{method}"'
+                for bound, count in zip(LATENCY_BUCKETS, endpoint['buckets']):
+                    lines.append(f'http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {endpoint["count"]}')
+                lines.append(f'http_request_duration_seconds_sum{{{labels}}} {endpoint["sum"]:.6f}')
+                lines.append(f'http_request_duration_seconds_count{{{labels}}} {endpoint["count"]}')
+
+            lines += ["# HELP db_queries_total SQL statements executed, by endpoint.",
+                      "# TYPE db_queries_total counter"]
+            lines += [f'db_queries_total{{endpoint="{rule}",method="{method}"}} {endpoint["queries"]}'
+                      for (rule, method), endpoint in endpoints]
+
+            lines += ["# HELP request_phase_seconds_total Time spent per phase (db, serialize, bcrypt), by endpoint.",
+                      "# TYPE request_phase_seconds_total counter"]
+            lines += [f'request_phase_seconds_total{{endpoint="{rule}",method="{method}",phase="{name}"}} {value:.6f}'
+                      for (rule, method), endpoint in endpoints for name, value in sorted(endpoint['phases'].items())]
+        return Response("\n".join(lines) + "\n", mimetype="text/plain; version=0.0.4")
+
+
+metrics = Metrics()
@@ -0,0 +1,32 @@
+"""Add table version counters
+
+Revision ID: 7e2b90d4f1a3
+Revises: c41d7a9e6b02
+Create Date: 2026-10-18 14:02:51.316420
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7e2b90d4f1a3'
+down_revision = 'c41d7a9e6b02'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    table_versions = op.create_table('table_versions',
+    sa.Column('table_name', sa.String(), nullable=False),
+    sa.Column('version', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('table_name')
+    )
+    op.bulk_insert(table_versions, [
+        {'table_name': name, 'version': 0}
+        for name in ('users', 'properties', 'units', 'tenants', 'leases', 'payments', 'expenses')
+    ])
+
+
+def downgrade():
+    op.drop_table('table_versions')
@@ -0,0 +1,38 @@
+"""Add lease ledger columns
+
+Revision ID: 980ac62540d7
+Revises: 5a508544bd8e
+Create Date: 2026-10-18 09:12:41.503117
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '980ac62540d7'
+down_revision = '5a508544bd8e'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('leases', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('total_paid', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('balance', sa.Float(), server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('last_payment_date', sa.Date(), nullable=True))
+
+    # Backfill the ledger from existing payments
+    op.execute("""
+        UPDATE leases SET
+            total_paid = COALESCE((SELECT SUM(amount) FROM payments WHERE payments.lease_id = leases.id), 0),
+            last_payment_date = (SELECT MAX(date) FROM payments WHERE payments.lease_id = leases.id)
+    """)
+    op.execute("UPDATE leases SET balance = rent_amount - total_paid")
+
+
+def downgrade():
+    with op.batch_alter_table('leases', schema=None) as batch_op:
+        batch_op.drop_column('last_payment_date')
+        batch_op.drop_column('balance')
+        batch_op.drop_column('total_paid')
@@ -0,0 +1,59 @@
+"""Add full-text search index
+
+Revision ID: b3f6a1d8c2e5
+Revises: 7e2b90d4f1a3
+Create Date: 2026-10-18 16:41:07.215803
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b3f6a1d8c2e5'
+down_revision = '7e2b90d4f1a3'
+branch_labels = None
+depends_on = None
+
+# kind: (rowid code, table, title column, detail column), as in search.py
+SOURCES = {
+    'tenant': (1, 'tenants', 'name', 'contact'),
+    'property': (2, 'properties', 'name', 'address'),
+    'expense': (3, 'expenses', 'description', 'category'),
+}
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        op.execute("CREATE VIRTUAL TABLE search_index USING fts5(kind UNINDEXED, title, detail, tokenize='trigram')")
+        for kind, (code, table, title, detail) in SOURCES.items():
+            insert = (f"INSERT INTO search_index(rowid, kind, title, detail) "
+                      f"VALUES (new.id * 4 + {code}, '{kind}', new.{title}, new.{detail});")
+            delete = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code};"
+            op.execute(f"CREATE TRIGGER {table}_search_insert AFTER INSERT ON {table} BEGIN {insert} END")
+            op.execute(f"CREATE TRIGGER {table}_search_update AFTER UPDATE OF {title}, {detail} ON {table} "
+                       f"BEGIN {delete} {insert} END")
+            op.execute(f"CREATE TRIGGER {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END")
+            # Backfill existing rows
+            op.execute(f"INSERT INTO search_index(rowid, kind, title, detail) "
+                       f"SELECT id * 4 + {code}, '{kind}', {title}, {detail} FROM {table}")
+    elif dialect == 'postgresql':
+        op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+        for _, table, title, detail in SOURCES.values():
+            for column in (title, detail):
+                op.create_index(f'ix_trgm_{table}_{column}', table, [sa.text(f'{column} gin_trgm_ops')],
+                                postgresql_using='gin')
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+    if dialect == 'sqlite':
+        for _, table, _, _ in SOURCES.values():
+            for action in ('insert', 'update', 'delete'):
+                op.execute(f"DROP TRIGGER IF EXISTS {table}_search_{action}")
+        op.execute("DROP TABLE IF EXISTS search_index")
+    elif dialect == 'postgresql':
+        for _, table, title, detail in SOURCES.values():
+            for column in (title, detail):
+                op.drop_index(f'ix_trgm_{table}_{column}', table_name=table)
@@ -0,0 +1,81 @@
+"""Add property x month report rollups
+
+Revision ID: c41d7a9e6b02
+Revises: 55fc61ce3275
+Create Date: 2026-10-18 13:20:37.884106
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c41d7a9e6b02'
+down_revision = '55fc61ce3275'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    monthly = op.create_table('property_monthly_rollups',
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('income', sa.Float(), nullable=False),
+    sa.Column('expense', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['property_id'], ['properties.id'], name=op.f('fk_property_monthly_rollups_property_id_properties'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('property_id', 'year', 'month')
+    )
+    with op.batch_alter_table('property_monthly_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_property_monthly_rollups_year_month', ['year', 'month', 'income', 'expense'], unique=False)
+
+    by_category = op.create_table('property_expense_rollups',
+    sa.Column('property_id', sa.Integer(), nullable=False),
+    sa.Column('year', sa.Integer(), nullable=False),
+    sa.Column('month', sa.Integer(), nullable=False),
+    sa.Column('category', sa.String(), nullable=False),
+    sa.Column('amount', sa.Float(), nullable=False),
+    sa.Column('first_expense_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['property_id'], ['properties.id'], name=op.f('fk_property_expense_rollups_property_id_properties'), ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('property_id', 'year', 'month', 'category')
+    )
+    with op.batch_alter_table('property_expense_rollups', schema=None) as batch_op:
+        batch_op.create_index('ix_property_expense_rollups_year_month', ['year', 'month', 'category', 'amount', 'first_expense_id'], unique=False)
+
+    # Backfill the rollups from existing payments and expenses
+    payments = sa.table('payments', sa.column('lease_id'), sa.column('amount'), sa.column('date'))
+    expenses = sa.table('expenses', sa.column('id'), sa.column('property_id'), sa.column('category'),
+                        sa.column('amount'), sa.column('date'))
+    leases = sa.table('leases', sa.column('id'), sa.column('unit_id'))
+    units = sa.table('units', sa.column('id'), sa.column('property_id'))
+
+    payment_year, payment_month = sa.extract('year', payments.c.date), sa.extract('month', payments.c.date)
+    expense_year, expense_month = sa.extract('year', expenses.c.date), sa.extract('month', expenses.c.date)
+    income = sa.select(units.c.property_id.label('property_id'), payment_year.label('year'),
+                       payment_month.label('month'), payments.c.amount.label('income'),
+                       sa.literal(0.0).label('expense')).select_from(
+        payments.join(leases, payments.c.lease_id == leases.c.id).join(units, leases.c.unit_id == units.c.id))
+    expense = sa.select(expenses.c.property_id, expense_year.label('year'), expense_month.label('month'),
+                        sa.literal(0.0).label('income'), expenses.c.amount.label('expense'))
+    combined = sa.union_all(income, expense).subquery()
+    op.execute(monthly.insert().from_select(
+        ['property_id', 'year', 'month', 'income', 'expense'],
+        sa.select(combined.c.property_id, combined.c.year, combined.c.month,
+                  sa.func.sum(combined.c.income), sa.func.sum(combined.c.expense)
+                  ).group_by(combined.c.property_id, combined.c.year, combined.c.month)))
+    op.execute(by_category.insert().from_select(
+        ['property_id', 'year', 'month', 'category', 'amount', 'first_expense_id'],
+        sa.select(expenses.c.property_id, expense_year, expense_month, expenses.c.category,
+                  sa.func.sum(expenses.c.amount), sa.func.min(expenses.c.id)
+                  ).group_by(expenses.c.property_id, expense_year, expense_month, expenses.c.category)))
+
+
+def downgrade():
+    with op.batch_alter_table('property_expense_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_expense_rollups_year_month')
+
+    with op.batch_alter_table('property_monthly_rollups', schema=None) as batch_op:
+        batch_op.drop_index('ix_property_monthly_rollups_year_month')
+
+    op.drop_table('property_expense_rollups')
+    op.drop_table('property_monthly_rollups')
@@ -1,16 +1,16 @@
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import MetaData
+from sqlalchemy import MetaData, and_, case, inspect
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import validates
 from sqlalchemy_serializer import SerializerMixin
 from datetime import date, timedelta
-from flask_bcrypt import Bcrypt
+from passwords import password_hasher
 
 metadata = MetaData(naming_convention={
     "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
 })
 
 db = SQLAlchemy(metadata=metadata)
-bcrypt = Bcrypt()
 
 
 class User(db.Model, SerializerMixin):
@@ -27,11 +27,15 @@ class User(db.Model, SerializerMixin):
 
     @password_hash.setter
     def password_hash(self, password):
-        self._password_hash = bcrypt.generate_password_hash(
-            password).decode('utf-8')
+        self._password_hash = password_hasher.hash(password)
 
     def authenticate(self, password):
-        return bcrypt.check_password_hash(self._password_hash, password)
+        if not password_hasher.check(self._password_hash, password):
+            return False
+        # Upgrade hashes made with an older BCRYPT_LOG_ROUNDS; the caller commits
+        if password_hasher.needs_rehash(self._password_hash):
+            self.password_hash = password
+        return True
 
 
 class Property(db.Model, SerializerMixin):
@@ -40,14 +44,17 @@ class Property(db.Model, SerializerMixin):
     name = db.Column(db.String, nullable=False)
     address = db.Column(db.String, nullable=False)
     units = db.relationship(
-        "Unit", back_populates="property", cascade="all, delete-orphan")
+        "Unit", back_populates="property", cascade="all, delete-orphan", order_by="Unit.id")
     expenses = db.relationship(
-        'Expense', back_populates='property', cascade="all, delete-orphan")
+        'Expense', back_populates='property', cascade="all, delete-orphan", order_by="Expense.id")
     serialize_rules = ("-units.property", "-expenses.property",)
 
 
 class Unit(db.Model, SerializerMixin):
     __tablename__ = "units"
+    __table_args__ = (
+        db.Index("ix_units_property_id_status", "property_id", "status"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     unit_number = db.Column(db.String, nullable=False)
     status = db.Column(db.String, default="vacant")
@@ -55,7 +62,7 @@ class Unit(db.Model, SerializerMixin):
         "properties.id", ondelete="CASCADE"), nullable=False)
     property = db.relationship("Property", back_populates="units")
     leases = db.relationship(
-        "Lease", back_populates="unit", cascade="all, delete-orphan")
+        "Lease", back_populates="unit", cascade="all, delete-orphan", order_by="Lease.id")
     serialize_rules = ("-leases.unit", "-property.units", "-property.expenses")
 
 
@@ -65,12 +72,18 @@ class Tenant(db.Model, SerializerMixin):
     name = db.Column(db.String, nullable=False)
     contact = db.Column(db.String, nullable=False)
     leases = db.relationship(
-        "Lease", back_populates="tenant", cascade="all, delete-orphan")
+        "Lease", back_populates="tenant", cascade="all, delete-orphan", order_by="Lease.id")
     serialize_rules = ("-leases",)
 
 
 class Lease(db.Model, SerializerMixin):
     __tablename__ = "leases"
+    __table_args__ = (
+        db.Index("ix_leases_tenant_id", "tenant_id"),
+        db.Index("ix_leases_unit_id", "unit_id"),
+        db.Index("ix_leases_end_date", "end_date"),
+        db.Index("ix_leases_balance", "balance"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     tenant_id = db.Column(db.Integer, db.ForeignKey(
         "tenants.id", ondelete="CASCADE"), nullable=False)
@@ -79,41 +92,64 @@ class Lease(db.Model, SerializerMixin):
     start_date = db.Column(db.Date, nullable=False)
     end_date = db.Column(db.Date, nullable=True)
     rent_amount = db.Column(db.Float, nullable=False)
+    # Ledger columns, maintained from payments by ledger.py
+    total_paid = db.Column(db.Float, nullable=False,
+                           default=0, server_default="0")
+    balance = db.Column(db.Float, nullable=False,
+                        default=0, server_default="0")
+    last_payment_date = db.Column(db.Date, nullable=True)
     tenant = db.relationship("Tenant", back_populates="leases")
     unit = db.relationship("Unit", back_populates="leases")
     payments = db.relationship(
-        "Payment", back_populates="lease", cascade="all, delete-orphan")
+        "Payment", back_populates="lease", cascade="all, delete-orphan", order_by="Payment.id")
     serialize_rules = ("-tenant.leases", "-unit.leases",
-                       "-payments.lease", "balance", "status")
+                       "-payments.lease", "status")
 
-    @property
-    def total_paid(self):
-        return sum(p.amount for p in self.payments)
-
-    @property
-    def balance(self):
-        return self.rent_amount - self.total_paid
+    @hybrid_property
+    def is_overdue(self):
+        return self.balance > 0
 
-    @property
+    @hybrid_property
     def status(self):
         today = date.today()
         if self.end_date and self.end_date < today:
             return "Expired"
-        if self.balance > 0:
+        if self.is_overdue:
             return "Overdue"
         if self.end_date and (self.end_date - today) <= timedelta(days=60):
             return "Expiring Soon"
         return "Active"
 
+    @status.expression
+    def status(cls):
+        today = date.today()
+        return case(
+            (and_(cls.end_date.isnot(None), cls.end_date < today), "Expired"),
+            (cls.is_overdue, "Overdue"),
+            (and_(cls.end_date.isnot(None), cls.end_date <=
+                  today + timedelta(days=60)), "Expiring Soon"),
+            else_="Active")
+
     @validates("rent_amount")
     def validate_rent(self, key, value):
         if not isinstance(value, (int, float)) or value <= 0:
             raise ValueError("Rent must be a positive number")
+        if inspect(self).persistent:
+            # Computed by the UPDATE from the stored total, which a payment committed since
+            # this lease was loaded may have changed
+            self.balance = value - Lease.total_paid
+        else:
+            self.balance = value - (self.total_paid or 0)
         return value
 
 
 class Payment(db.Model, SerializerMixin):
     __tablename__ = "payments"
+    __table_args__ = (
+        db.Index("ix_payments_lease_id_date", "lease_id", "date"),
+        db.Index("ix_payments_date_lease_id_amount",
+                 "date", "lease_id", "amount"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     lease_id = db.Column(db.Integer, db.ForeignKey(
         "leases.id", ondelete="CASCADE"), nullable=False)
@@ -132,6 +168,11 @@ class Payment(db.Model, SerializerMixin):
 
 class Expense(db.Model, SerializerMixin):
     __tablename__ = 'expenses'
+    __table_args__ = (
+        db.Index("ix_expenses_property_id_date", "property_id", "date"),
+        db.Index("ix_expenses_date_category_amount",
+                 "date", "category", "amount"),
+    )
     id = db.Column(db.Integer, primary_key=True)
     property_id = db.Column(db.Integer, db.ForeignKey(
         'properties.id', ondelete="CASCADE"), nullable=False)
@@ -141,3 +182,40 @@ class Expense(db.Model, SerializerMixin):
     date = db.Column(db.Date, nullable=False)
     property = db.relationship('Property', back_populates='expenses')
     serialize_rules = ('-property.units', '-property.expenses')
+
+
+class PropertyMonthlyRollup(db.Model):
+    __tablename__ = 'property_monthly_rollups'
+    __table_args__ = (
+        db.Index("ix_property_monthly_rollups_year_month",
+                 "year", "month", "income", "expense"),
+    )
+    property_id = db.Column(db.Integer, db.ForeignKey(
+        'properties.id', ondelete="CASCADE"), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    income = db.Column(db.Float, nullable=False, default=0)
+    expense = db.Column(db.Float, nullable=False, default=0)
+
+
+class PropertyExpenseRollup(db.Model):
+    __tablename__ = 'property_expense_rollups'
+    __table_args__ = (
+        db.Index("ix_property_expense_rollups_year_month",
+                 "year", "month", "category", "amount", "first_expense_id"),
+    )
+    property_id = db.Column(db.Integer, db.ForeignKey(
+        'properties.id', ondelete="CASCADE"), primary_key=True)
+    year = db.Column(db.Integer, primary_key=True)
+    month = db.Column(db.Integer, primary_key=True)
+    category = db.Column(db.String, primary_key=True)
+    amount = db.Column(db.Float, nullable=False, default=0)
+    # Lowest expense id in the bucket, keeps the report's category order stable
+    first_expense_id = db.Column(db.Integer, nullable=False)
+
+
+class TableVersion(db.Model):
+    # Generation counter per table, advanced in the same transaction as every write to it
+    __tablename__ = 'table_versions'
+    table_name = db.Column(db.String, primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
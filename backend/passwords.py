@@ -0,0 +1,78 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from flask_bcrypt import Bcrypt
+from metrics import timed
+
+
+class HasherBusy(Exception):
+    pass
+
+
+def hash_rounds(password_hash):
+    """The bcrypt cost stored in a hash such as $2b$12$..."""
+    return int(password_hash.split('$')[2])
+
+
+class PasswordHasher:
+    """bcrypt hashing with a configurable cost, run on a small bounded pool.
+
+    At most PASSWORD_HASH_WORKERS hashes run at once per process; when
+    PASSWORD_HASH_QUEUE_SIZE more are already waiting, further calls raise
+    HasherBusy instead of queueing, so a burst of logins sheds load rather than
+    tying up the workers that serve everything else. bcrypt releases the GIL, so
+    the default thread pool hashes in parallel; 'process' isolates it completely.
+
+    The limits are per process, so they need a server that runs several requests
+    per process, such as gunicorn's gthread workers (see gunicorn.conf.py). With
+    sync workers there is never more than one hash pending and nothing is shed.
+    """
+
+    def __init__(self, app=None):
+        self.bcrypt = Bcrypt()
+        self.rounds = 12
+        self.executor = None
+        self.max_pending = 0
+        self.pending = 0
+        self.lock = threading.Lock()
+        if app is not None:
+            self.init_app(app)
+
+    def init_app(self, app):
+        self.bcrypt.init_app(app)
+        self.rounds = app.config.setdefault('BCRYPT_LOG_ROUNDS', 12)
+        workers = app.config.setdefault('PASSWORD_HASH_WORKERS', 2)
+        self.max_pending = workers + app.config.setdefault('PASSWORD_HASH_QUEUE_SIZE', 8)
+        pool = app.config.setdefault('PASSWORD_HASH_POOL', 'thread')
+        if pool not in ('thread', 'process'):
+            raise ValueError(f"PASSWORD_HASH_POOL must be 'thread' or 'process', not {pool!r}")
+        if pool == 'process':
+            self.executor = ProcessPoolExecutor(max_workers=workers)
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hash')
+
+    def _call(self, fn, *args):
+        if self.executor is None:
+            with timed('bcrypt'):
+                return fn(*args)
+        with self.lock:
+            if self.pending >= self.max_pending:
+                raise HasherBusy(f"{self.pending} password hashes already queued or running")
+            self.pending += 1
+        try:
+            with timed('bcrypt'):
+                return self.executor.submit(fn, *args).result()
+        finally:
+            with self.lock:
+                self.pending -= 1
+
+    def hash(self, password):
+        return self._call(self.bcrypt.generate_password_hash, password, self.rounds).decode('utf-8')
+
+    def check(self, password_hash, password):
+        return self._call(self.bcrypt.check_password_hash, password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        return hash_rounds(password_hash) != self.rounds
+
+
+password_hasher = PasswordHasher()
@@ -0,0 +1,84 @@
+import re
+import click
+from flask import current_app
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from models import db
+from query_shapes import sample_ids
+
+# Endpoints on the report and relationship access paths, with the tables each
+# one may read in full (whole-table aggregates). Any other table scan fails the check.
+PLAN_CHECKS = [
+    ("/dashboard_summary", {"leases", "properties"}),
+    ("/reports/property_financials?property_id=all&year={year}", set()),
+    ("/reports/property_financials?property_id={property_id}&year={year}", set()),
+    ("/properties/{property_id}", set()),
+    ("/units/{unit_id}", set()),
+    ("/leases/{lease_id}", set()),
+    ("/payments?lease_id={lease_id}", set()),
+    ("/expenses?property_id={property_id}", set()),
+]
+
+TABLE_SCAN = re.compile(r'^SCAN (?:TABLE )?(\w+)(?: AS \w+)?$')
+
+
+def capture_statements(engine, func):
+    """Run func() and return the SELECT statements it issued"""
+    statements = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', capture)
+    try:
+        func()
+    finally:
+        event.remove(engine, 'before_cursor_execute', capture)
+    return statements
+
+
+def table_scans(connection, statement, parameters):
+    plan = connection.exec_driver_sql(
+        'EXPLAIN QUERY PLAN ' + statement, parameters).all()
+    return {match.group(1) for row in plan if (match := TABLE_SCAN.match(row[-1]))}
+
+
+def unexpected_scans(app, client, url, allowed=()):
+    """(table, statement) for every full table scan a GET of url makes, other than of the allowed tables"""
+    with app.app_context():
+        statements = capture_statements(db.engine, lambda: client.get(url))
+        connection = db.session.connection()
+        return [(table, statement) for statement, parameters in statements
+                for table in sorted(table_scans(connection, statement, parameters) - set(allowed))]
+
+
+def check_query_plans(app, year):
+    """Return (url, table, statement) for every unexpected full table scan"""
+    with app.app_context():
+        ids = sample_ids(year)
+
+    client = app.test_client()
+    violations = []
+    for template, allowed in PLAN_CHECKS:
+        url = template.format(**ids)
+        violations += [(url, table, statement) for table, statement in unexpected_scans(app, client, url, allowed)]
+    return violations
+
+
+@click.command('check-query-plans')
+@with_appcontext
+@click.option('--year', type=int, default=2025, help='Year used for report endpoints.')
+def check_query_plans_command(year):
+    """Fail if a report or relationship endpoint falls back to a table scan (SQLite only)"""
+    app = current_app._get_current_object()
+    if db.engine.dialect.name != 'sqlite':
+        click.echo(
+            f"EXPLAIN QUERY PLAN checks only run on SQLite, not {db.engine.dialect.name}.")
+        return
+    violations = check_query_plans(app, year)
+    for url, table, statement in violations:
+        click.echo(f"{url}: full scan of {table}\n    {' '.join(statement.split())}")
+    click.echo(f"Checked {len(PLAN_CHECKS)} endpoints, {len(violations)} table scans.")
+    if violations:
+        raise SystemExit(1)
@@ -0,0 +1,200 @@
+import os
+import re
+import traceback
+import warnings
+from collections import Counter
+from contextlib import contextmanager
+import click
+from flask import current_app, g, has_app_context
+from flask.cli import with_appcontext
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.engine.interfaces import ExecuteStyle
+from models import db, Property, Unit, Lease
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Endpoints with the most SQL statements one request may issue. Budgets are fixed
+# numbers, so they also fail when a page starts issuing one query per row.
+QUERY_BUDGETS = [
+    ("/dashboard_summary", 6),
+    ("/reports/property_financials?property_id=all&year={year}", 5),
+    ("/reports/property_financials?property_id={property_id}&year={year}", 5),
+    ("/reports/arrears", 5),
+    ("/reports/arrears?property_id={property_id}", 5),
+    ("/reports/rent_roll", 6),
+    ("/reports/rent_roll?property_id={property_id}&months=24", 6),
+    ("/search?q=road", 3),
+    ("/search?q=a&type=tenant,property", 3),
+    ("/properties/{property_id}", 3),
+    ("/properties/{property_id}?expand=units.leases.tenant,expenses", 6),
+    ("/units/{unit_id}", 3),
+    ("/leases/{lease_id}", 3),
+    ("/properties?limit=100", 3),
+    ("/units?limit=100", 3),
+    ("/leases?limit=100", 3),
+    ("/leases?limit=100&expand=payments,unit.property", 4),
+    ("/payments?lease_id={lease_id}&limit=100", 3),
+    ("/payments?limit=100&expand=lease.tenant,lease.unit.property", 3),
+    ("/expenses?property_id={property_id}&limit=100", 3),
+]
+
+PLACEHOLDER = re.compile(r"%\(\w+\)s|:\w+|\$\d+|\?")
+PLACEHOLDER_LIST = re.compile(r"\?(?:\s*,\s*\?)+")
+LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+
+
+class NPlusOneWarning(UserWarning):
+    pass
+
+
+class NPlusOneError(Exception):
+    pass
+
+
+def statement_shape(statement):
+    """The statement with literals, placeholders and IN lists collapsed, so repeats compare equal"""
+    shape = PLACEHOLDER.sub('?', statement)
+    shape = LITERAL.sub('?', shape)
+    shape = PLACEHOLDER_LIST.sub('?', shape)
+    return ' '.join(shape.split())
+
+
+def is_batch(context, executemany):
+    """Whether a statement is one batch of a multi-row write, which repeats by design rather than N+1"""
+    return executemany or getattr(context, 'execute_style', None) is ExecuteStyle.INSERTMANYVALUES
+
+
+def code_location(depth=3):
+    """The innermost application frame of each of the last few files on the stack, innermost first"""
+    frames, files = [], []
+    for frame in reversed(traceback.extract_stack()[:-2]):
+        path = os.path.abspath(frame.filename)
+        if (not path.startswith(BACKEND_DIR) or not os.path.isfile(path) or path == os.path.abspath(__file__)
+                or 'site-packages' in path or (files and files[-1] == path)):
+            continue
+        files.append(path)
+        frames.append(f"{os.path.relpath(path, BACKEND_DIR)}:{frame.lineno} in {frame.name}")
+        if len(frames) == depth:
+            break
+    return ' <- '.join(frames) or 'unknown'
+
+
+class ShapeCounter:
+    """Counts statements by shape and reports the first time a shape passes the threshold"""
+
+    def __init__(self, threshold, on_repeat):
+        self.threshold = threshold
+        self.on_repeat = on_repeat
+        self.shapes = Counter()
+        self.total = 0
+
+    def add(self, statement, batch=False):
+        """Count a statement; batches of one multi-row write count towards the total but not as repeats"""
+        self.total += 1
+        if batch:
+            return
+        shape = statement_shape(statement)
+        self.shapes[shape] += 1
+        if self.shapes[shape] == self.threshold + 1:
+            self.on_repeat(f"Statement repeated more than {self.threshold} times in one request "
+                           f"(likely N+1) at {code_location()}: {shape}")
+
+    def repeated(self):
+        return {shape: count for shape, count in self.shapes.items() if count > self.threshold}
+
+
+# --- Opt-in per-request detector: NPLUSONE_MODE=warn|raise, NPLUSONE_THRESHOLD=K ---
+
+def init_detector(app):
+    mode = app.config.setdefault('NPLUSONE_MODE', 'off')
+    if mode not in ('warn', 'raise'):
+        return
+    threshold = app.config.setdefault('NPLUSONE_THRESHOLD', 5)
+
+    def on_repeat(message):
+        if mode == 'raise':
+            raise NPlusOneError(message)
+        app.logger.warning(message)
+        warnings.warn(message, NPlusOneWarning, stacklevel=2)
+
+    @app.before_request
+    def _start_counting():
+        g.query_shapes = ShapeCounter(threshold, on_repeat)
+
+    @event.listens_for(Engine, "before_cursor_execute")
+    def _count_statement(conn, cursor, statement, parameters, context, executemany):
+        counter = g.get('query_shapes') if has_app_context() else None
+        if counter is not None:
+            counter.add(statement, is_batch(context, executemany))
+
+
+@contextmanager
+def query_budget(max_queries=None, threshold=5, engine=None):
+    """Fail the block if it issues more than max_queries statements or repeats a shape more than threshold times.
+
+        with query_budget(max_queries=6):
+            client.get("/dashboard_summary")
+    """
+    # Collected rather than raised: an exception inside the event would only abort one statement
+    problems = []
+    counter = ShapeCounter(threshold, problems.append)
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        counter.add(statement, is_batch(context, executemany))
+
+    target = engine or Engine
+    event.listen(target, 'before_cursor_execute', count)
+    try:
+        yield counter
+    finally:
+        event.remove(target, 'before_cursor_execute', count)
+    if max_queries is not None and counter.total > max_queries:
+        problems.insert(0, f"{counter.total} statements issued, budget is {max_queries}")
+    if problems:
+        raise AssertionError('\n'.join(problems))
+
+
+def sample_ids(year):
+    """Values for the placeholders in QUERY_BUDGETS urls, from the first rows of the current database"""
+    return {
+        "year": year,
+        "property_id": db.session.query(Property.id).order_by(Property.id).limit(1).scalar() or 1,
+        "unit_id": db.session.query(Unit.id).order_by(Unit.id).limit(1).scalar() or 1,
+        "lease_id": db.session.query(Lease.id).order_by(Lease.id).limit(1).scalar() or 1,
+    }
+
+
+def check_query_budgets(app, year, threshold):
+    """Return (url, problem) for every endpoint over its budget or issuing repeated statements"""
+    from cache import response_cache
+
+    with app.app_context():
+        ids = sample_ids(year)
+        engine = db.engine
+
+    client = app.test_client()
+    violations = []
+    for template, budget in QUERY_BUDGETS:
+        url = template.format(**ids)
+        response_cache.store.clear()
+        try:
+            with query_budget(budget, threshold, engine):
+                client.get(url)
+        except AssertionError as e:
+            violations.append((url, str(e)))
+    return violations
+
+
+@click.command('check-query-budgets')
+@with_appcontext
+@click.option('--year', type=int, default=2025, help='Year used for report endpoints.')
+@click.option('--threshold', type=int, default=5, help='Times one statement shape may repeat per request.')
+def check_query_budgets_command(year, threshold):
+    """Fail if an endpoint exceeds its query budget or repeats a statement (N+1)"""
+    violations = check_query_budgets(current_app._get_current_object(), year, threshold)
+    for url, problem in violations:
+        click.echo(f"{url}: {problem}")
+    click.echo(f"Checked {len(QUERY_BUDGETS)} endpoints, {len(violations)} over budget.")
+    if violations:
+        raise SystemExit(1)
@@ -0,0 +1,97 @@
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+
+DATE_FORMAT = '%Y-%m-%d'
+MAX_PAGE_SIZE = 1000
+LOADERS = {'joined': joinedload, 'selectin': selectinload}
+
+
+def encode_cursor(values):
+    """Opaque keyset cursor for the last row of a page"""
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(token, length):
+    """Values of a cursor from encode_cursor; there must be length of them, the last an integer id or offset"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(token.encode()))
+    except (ValueError, TypeError):
+        raise ValueError("Invalid cursor")
+    if (not isinstance(values, list) or len(values) != length
+            or not isinstance(values[-1], int) or isinstance(values[-1], bool)):
+        raise ValueError("Invalid cursor")
+    return values
+
+
+def parse_date(value):
+    return datetime.strptime(value, DATE_FORMAT).date()
+
+
+def parse_param(column, value):
+    """Convert a query string value to the python type of a column"""
+    python_type = column.type.python_type
+    try:
+        if python_type is date:
+            return parse_date(value)
+        return python_type(value)
+    except (ValueError, TypeError):
+        raise ValueError(f"Invalid value for {column.key}: {value}")
+
+
+def parse_limit(value, maximum=MAX_PAGE_SIZE):
+    if value is None:
+        return None
+    try:
+        limit = int(value)
+    except ValueError:
+        raise ValueError(f"Invalid limit: {value}")
+    if limit < 1:
+        raise ValueError("limit must be a positive integer")
+    return min(limit, maximum) if maximum else limit
+
+
+def json_value(value):
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, date):
+        return value.strftime(DATE_FORMAT)
+    return value
+
+
+def parse_expand(value, allowed):
+    """Relationship paths named in ?expand=, plus their parents; raises ValueError for unknown ones"""
+    paths = {path.strip() for path in value.split(',') if path.strip()}
+    unknown = sorted(paths.difference(allowed))
+    if unknown:
+        raise ValueError(f"Cannot expand: {', '.join(unknown)}")
+    for path in list(paths):
+        parts = path.split('.')
+        paths.update('.'.join(parts[:i]) for i in range(1, len(parts)))
+    return tuple(sorted(paths))
+
+
+def loader_options(model, expand, strategies=None):
+    """Eager loader options for the expanded paths.
+
+    Each step uses the strategy named in strategies ('joined' or 'selectin') for its
+    path, else joins a many-to-one and loads a collection with one SELECT ... IN.
+    """
+    strategies = strategies or {}
+    options = []
+    for path in expand:
+        if any(other.startswith(f"{path}.") for other in expand):
+            continue
+        option, current, keys = None, model, []
+        for key in path.split('.'):
+            keys.append(key)
+            relationship = inspect(current).relationships[key]
+            strategy = strategies.get('.'.join(keys), 'selectin' if relationship.uselist else 'joined')
+            attribute = getattr(current, key)
+            option = (LOADERS[strategy](attribute) if option is None
+                      else getattr(option, LOADERS[strategy].__name__)(attribute))
+            current = relationship.mapper.class_
+        options.append(option)
+    return options
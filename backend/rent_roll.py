@@ -0,0 +1,112 @@
+import numpy as np
+from sqlalchemy import func, or_, select
+from models import db, Property, Unit, Lease
+from arrears import arrears, columns, installments_due, load_leases, lookup
+
+# Tables the report reads, for write-invalidated caching
+RENT_ROLL_TABLES = ('properties', 'units', 'leases', 'payments')
+MAX_HORIZON = 60
+
+
+def month_bounds(first_month, months):
+    """First and last day (datetime64[D]) of each month of the horizon"""
+    starts = np.datetime64(first_month, 'M') + np.arange(months)
+    return starts.astype('datetime64[D]'), (starts + 1).astype('datetime64[D]') - 1
+
+
+def group_sum(groups, values, count):
+    """Row sums of values per group index, as a (count, months) array"""
+    totals = np.zeros((count, values.shape[1]))
+    np.add.at(totals, groups, values)
+    return totals
+
+
+def collection_rates(leases, today):
+    """Share of accrued rent each lease's tenant has paid across all their leases, and the portfolio's.
+
+    Capped at 1 so prepayments don't inflate a forecast; tenants with nothing
+    accrued yet get the portfolio rate.
+    """
+    history = arrears(leases, today)
+    tenants, tenant_index = np.unique(leases["tenant_id"], return_inverse=True)
+    accrued = np.bincount(tenant_index, history["accrued"], len(tenants))
+    paid = np.bincount(tenant_index, history["paid"], len(tenants))
+    portfolio = min(paid.sum() / accrued.sum(), 1.0) if accrued.sum() > 0 else 1.0
+    rates = np.full(len(tenants), portfolio)
+    np.divide(paid, accrued, out=rates, where=accrued > 0)
+    return np.minimum(rates, 1.0)[tenant_index], portfolio
+
+
+def latest_rents(units, starts, rents, count):
+    """Rent of each unit's latest-starting lease, given the unit index of every lease"""
+    order = np.lexsort((starts, units))
+    latest = np.zeros(count)
+    latest[units[order]] = rents[order]  # later assignments win, so each unit keeps its latest lease
+    return latest
+
+
+def rent_roll(first_month, months, today, property_id=None):
+    """Expected rent per property per month over the horizon, and the rent at risk from vacancies.
+
+    Each lease's installments falling due in a month are weighted by its tenant's
+    collection rate so far. A unit adds its latest rent (or, never leased, its
+    property's average) to the vacancy exposure for every month no lease covers it,
+    whatever its status says, so no rent counts as both expected and at risk.
+    """
+    first_days, last_days = month_bounds(first_month, months)
+    horizon_start = first_month.replace(day=1)
+    tenants_in_horizon = select(Lease.tenant_id).where(or_(Lease.end_date >= horizon_start, Lease.end_date.is_(None)))
+    leases = load_leases(today, Lease.tenant_id.in_(tenants_in_horizon), property_id=property_id)
+    rates, portfolio_rate = collection_rates(leases, today)
+
+    properties_query = select(Property.id, Property.name).order_by(Property.id)
+    units_query = select(Unit.property_id, Unit.status, func.count(Unit.id)).group_by(Unit.property_id, Unit.status)
+    if property_id is not None:
+        properties_query = properties_query.where(Property.id == property_id)
+        units_query = units_query.where(Unit.property_id == property_id)
+    property_ids, names = columns(db.session.execute(properties_query), 2)
+    property_ids = np.array(property_ids, dtype=np.int64)
+    unit_property_ids, statuses, counts = columns(db.session.execute(units_query), 3)
+    groups, counts = lookup(property_ids, np.array(unit_property_ids, dtype=np.int64))[0], np.array(counts, dtype=np.int64)
+    unit_counts = np.bincount(groups, counts, len(property_ids)).astype(np.int64)
+    vacant_counts = np.bincount(groups, counts * (np.array(statuses, dtype=object) == 'vacant'),
+                                len(property_ids)).astype(np.int64)
+
+    # (lease, month) matrices; an open-ended lease (end NaT) runs past the horizon
+    start, end = leases["start"][:, None], leases["end"][:, None]
+    due = installments_due(start, np.fmin(end, last_days)) - installments_due(start, np.fmin(end, first_days - 1))
+    contracted = due * leases["rent"][:, None]
+    expected = contracted * rates[:, None]
+    lease_property = lookup(property_ids, leases["property_id"])[0]
+
+    # Coverage of every unit with a lease on file; the rest are uncovered throughout
+    unit_ids, first_lease, lease_unit = np.unique(leases["unit_id"], return_index=True, return_inverse=True)
+    unit_property = lease_property[first_lease]
+    covering = (start <= last_days) & ~(end < first_days)
+    covered = np.zeros((len(unit_ids), months), dtype=bool)
+    lease_rows, month_columns = np.nonzero(covering)
+    covered[lease_unit[lease_rows], month_columns] = True
+
+    unit_rents = latest_rents(lease_unit, leases["start"], leases["rent"], len(unit_ids))
+    leased_units = np.bincount(unit_property, minlength=len(property_ids))
+    average_rents = np.divide(np.bincount(unit_property, unit_rents, len(property_ids)), leased_units,
+                              out=np.zeros(len(property_ids)), where=leased_units > 0)
+    exposure = group_sum(unit_property, ~covered * unit_rents[:, None], len(property_ids))
+    exposure += ((unit_counts - leased_units).clip(0) * average_rents)[:, None]
+
+    by_property = {
+        "contracted_rent": group_sum(lease_property, contracted, len(property_ids)),
+        "expected_income": group_sum(lease_property, expected, len(property_ids)),
+        "vacancy_exposure": exposure,
+    }
+    periods = [str(month) for month in first_days.astype('datetime64[M]')]
+    return {
+        "from": periods[0], "months": months, "periods": periods, "as_of": today.isoformat(),
+        "collection_rate": round(float(portfolio_rate), 4),
+        "totals": {name: np.round(values.sum(axis=0), 2).tolist() for name, values in by_property.items()},
+        "properties": [
+            {"property_id": int(property_ids[i]), "name": names[i], "units": int(unit_counts[i]),
+             "vacant_units": int(vacant_counts[i]),
+             **{name: np.round(values[i], 2).tolist() for name, values in by_property.items()}}
+            for i in range(len(property_ids))],
+    }
@@ -0,0 +1,178 @@
+from datetime import date, timedelta
+from sqlalchemy import func, case, tuple_
+from models import db, Property, Unit, Tenant, Lease, Payment, Expense, PropertyMonthlyRollup, PropertyExpenseRollup
+
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May",
+               "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+# Tables each report reads, for write-invalidated caching
+DASHBOARD_TABLES = ('properties', 'units', 'tenants', 'leases')
+# The financials read the rollups, which `flask rollups rebuild` rewrites without touching the source tables
+FINANCIALS_TABLES = ('properties', 'units', 'leases', 'payments', 'expenses',
+                     'property_monthly_rollups', 'property_expense_rollups')
+
+
+def dashboard_summary(today=None):
+    """Dashboard metrics computed from the lease ledger with a fixed number of queries"""
+    today = today or date.today()
+    expiring_limit = today + timedelta(days=60)
+
+    rent_total, collected, pending, expiring = db.session.query(
+        func.coalesce(func.sum(Lease.rent_amount), 0),
+        func.coalesce(func.sum(Lease.total_paid), 0),
+        func.coalesce(func.sum(
+            case((Lease.is_overdue, Lease.balance), else_=0)), 0),
+        func.count(case((Lease.end_date.between(today, expiring_limit), 1)))
+    ).one()
+
+    unit_counts = dict(db.session.query(
+        Unit.status, func.count(Unit.id)).group_by(Unit.status).all())
+
+    overdue = db.session.query(
+        Lease.id, Tenant.name, Unit.unit_number, Lease.balance
+    ).join(Tenant, Lease.tenant_id == Tenant.id).join(
+        Unit, Lease.unit_id == Unit.id
+    ).filter(Lease.is_overdue).order_by(Lease.id).all()
+
+    return {
+        "total_properties": Property.query.count(),
+        "occupied_units": unit_counts.get('occupied', 0),
+        "vacant_units": unit_counts.get('vacant', 0),
+        "total_monthly_rent": rent_total,
+        "total_collected": collected,
+        "total_pending": pending,
+        "expiring_leases_count": expiring,
+        "overdue_leases": [{"lease_id": lease_id, "tenant_name": tenant_name, "unit_number": unit_number, "balance": lease_balance}
+                           for lease_id, tenant_name, unit_number, lease_balance in overdue]
+    }
+
+
+GRANULARITIES = ('month', 'quarter', 'year')
+
+
+def period_of(year, month, granularity):
+    if granularity == 'month':
+        return (year, month)
+    if granularity == 'quarter':
+        return (year, (month - 1) // 3 + 1)
+    return (year,)
+
+
+def periods_between(start, end, granularity):
+    """Every period key from the one containing start up to end (exclusive)"""
+    last = end - timedelta(days=1)
+    keys = []
+    year, month = start.year, start.month
+    while (year, month) <= (last.year, last.month):
+        key = period_of(year, month, granularity)
+        if not keys or keys[-1] != key:
+            keys.append(key)
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    return keys
+
+
+def period_names(key, granularity, single_year):
+    """(display name, sortable period id) for a period key"""
+    if granularity == 'month':
+        name = MONTH_NAMES[key[1]-1]
+        return (name if single_year else f"{name} {key[0]}"), f"{key[0]:04d}-{key[1]:02d}"
+    if granularity == 'quarter':
+        return f"Q{key[1]} {key[0]}", f"{key[0]:04d}-Q{key[1]}"
+    return str(key[0]), f"{key[0]:04d}"
+
+
+def monthly_totals(property_id, start, end):
+    """(year, month, income, expense) rows plus the category breakdown over [start, end).
+
+    Month-aligned ranges are answered from the rollup tables; anything else
+    aggregates the raw payments and expenses.
+    """
+    if start.day == 1 and end.day == 1:
+        return rollup_totals(property_id, start, end)
+
+    payment_year, payment_month = db.extract('year', Payment.date), db.extract('month', Payment.date)
+    expense_year, expense_month = db.extract('year', Expense.date), db.extract('month', Expense.date)
+    payments_query = db.session.query(
+        payment_year, payment_month, func.sum(Payment.amount)
+    ).filter(Payment.date >= start, Payment.date < end)
+    expenses_query = db.session.query(
+        expense_year, expense_month, func.sum(Expense.amount)
+    ).filter(Expense.date >= start, Expense.date < end)
+    categories_query = db.session.query(
+        Expense.category, func.sum(Expense.amount)
+    ).filter(Expense.date >= start, Expense.date < end)
+
+    if property_id is not None:
+        payments_query = payments_query.join(Lease, Payment.lease_id == Lease.id).join(
+            Unit, Lease.unit_id == Unit.id).filter(Unit.property_id == property_id)
+        expenses_query = expenses_query.filter(
+            Expense.property_id == property_id)
+        categories_query = categories_query.filter(
+            Expense.property_id == property_id)
+
+    rows = [(year, month, amount, 0) for year, month, amount in payments_query.group_by(payment_year, payment_month)]
+    rows += [(year, month, 0, amount) for year, month, amount in expenses_query.group_by(expense_year, expense_month)]
+    categories = categories_query.group_by(Expense.category).order_by(func.min(Expense.id)).all()
+    return rows, categories
+
+
+def rollup_totals(property_id, start, end):
+    """monthly_totals() for a month-aligned range, read from the property x month rollups"""
+    Monthly, ByCategory = PropertyMonthlyRollup, PropertyExpenseRollup
+    rows_query = db.session.query(
+        Monthly.year, Monthly.month, func.sum(Monthly.income), func.sum(Monthly.expense)
+    ).filter(tuple_(Monthly.year, Monthly.month) >= (start.year, start.month),
+             tuple_(Monthly.year, Monthly.month) < (end.year, end.month))
+    categories_query = db.session.query(
+        ByCategory.category, func.sum(ByCategory.amount)
+    ).filter(tuple_(ByCategory.year, ByCategory.month) >= (start.year, start.month),
+             tuple_(ByCategory.year, ByCategory.month) < (end.year, end.month))
+
+    if property_id is not None:
+        rows_query = rows_query.filter(Monthly.property_id == property_id)
+        categories_query = categories_query.filter(ByCategory.property_id == property_id)
+
+    # A bucket may only carry one side; report the missing side as a plain 0 like the raw path does
+    rows = [(year, month, income or 0, expense or 0)
+            for year, month, income, expense in rows_query.group_by(Monthly.year, Monthly.month)]
+    categories = categories_query.group_by(ByCategory.category).order_by(func.min(ByCategory.first_expense_id)).all()
+    return rows, categories
+
+
+def property_financials(property_id, start, end, granularity='month'):
+    """Income/expense report over [start, end) built from GROUP BY aggregates only"""
+    rows, categories = monthly_totals(property_id, start, end)
+    units_query = db.session.query(Unit.status, func.count(Unit.id))
+    if property_id is not None:
+        units_query = units_query.filter(Unit.property_id == property_id)
+
+    income_by_period, expense_by_period = {}, {}
+    for year, month, income, expense in rows:
+        key = period_of(int(year), int(month), granularity)
+        income_by_period[key] = income_by_period.get(key, 0) + income
+        expense_by_period[key] = expense_by_period.get(key, 0) + expense
+
+    single_year = start.year == (end - timedelta(days=1)).year
+    chart_data = []
+    for key in periods_between(start, end, granularity):
+        name, period = period_names(key, granularity, single_year)
+        income = income_by_period.get(key, 0)
+        expense = expense_by_period.get(key, 0)
+        chart_data.append(
+            {"name": name, "period": period, "Income": income, "Expense": expense, "Net Profit": income - expense})
+
+    expense_breakdown = [{"name": cat, "value": val} for cat, val in categories]
+
+    total_income = sum(income_by_period.values())
+    total_expense = sum(expense_by_period.values())
+
+    unit_counts = dict(units_query.group_by(Unit.status).all())
+    total_units = sum(unit_counts.values())
+    occupancy_rate = (unit_counts.get('occupied', 0) / total_units) * \
+        100 if total_units > 0 else 0
+
+    return {
+        "total_income": total_income, "total_expense": total_expense, "net_profit": total_income - total_expense,
+        "occupancy_rate": round(occupancy_rate, 2), "monthly_breakdown": chart_data, "expense_breakdown": expense_breakdown,
+        "from": start.isoformat(), "to": end.isoformat(), "granularity": granularity
+    }
@@ -0,0 +1,238 @@
+import click
+from collections import defaultdict
+from datetime import date
+from flask.cli import AppGroup
+from sqlalchemy import delete, event, extract, func, inspect, insert, select, tuple_
+from sqlalchemy.orm import Session
+from models import db, Property, Unit, Lease, Payment, Expense, PropertyMonthlyRollup, PropertyExpenseRollup
+from versions import bump_versions
+
+monthly = PropertyMonthlyRollup.__table__
+properties = Property.__table__
+by_category = PropertyExpenseRollup.__table__
+payments, expenses = Payment.__table__, Expense.__table__
+leases, units = Lease.__table__, Unit.__table__
+
+
+def next_month(year, month):
+    return date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+
+
+def aggregate(connection, property_ids=None, start=None, end=None):
+    """Income, expense and per-category totals per (property_id, year, month) from the raw tables"""
+    payment_year, payment_month = extract('year', payments.c.date), extract('month', payments.c.date)
+    expense_year, expense_month = extract('year', expenses.c.date), extract('month', expenses.c.date)
+    income_query = select(units.c.property_id, payment_year, payment_month, func.sum(payments.c.amount)).select_from(
+        payments.join(leases, payments.c.lease_id == leases.c.id).join(units, leases.c.unit_id == units.c.id)
+    ).group_by(units.c.property_id, payment_year, payment_month)
+    expense_query = select(expenses.c.property_id, expense_year, expense_month, func.sum(expenses.c.amount)).group_by(
+        expenses.c.property_id, expense_year, expense_month)
+    category_query = select(expenses.c.property_id, expense_year, expense_month, expenses.c.category,
+                            func.sum(expenses.c.amount), func.min(expenses.c.id)).group_by(
+        expenses.c.property_id, expense_year, expense_month, expenses.c.category)
+
+    if property_ids is not None:
+        income_query = income_query.where(units.c.property_id.in_(property_ids))
+        expense_query = expense_query.where(expenses.c.property_id.in_(property_ids))
+        category_query = category_query.where(expenses.c.property_id.in_(property_ids))
+    if start is not None:
+        income_query = income_query.where(payments.c.date >= start, payments.c.date < end)
+        expense_query = expense_query.where(expenses.c.date >= start, expenses.c.date < end)
+        category_query = category_query.where(expenses.c.date >= start, expenses.c.date < end)
+
+    totals = defaultdict(lambda: {'income': 0, 'expense': 0})
+    for property_id, year, month, amount in connection.execute(income_query):
+        totals[(property_id, int(year), int(month))]['income'] = amount
+    for property_id, year, month, amount in connection.execute(expense_query):
+        totals[(property_id, int(year), int(month))]['expense'] = amount
+    categories = {(property_id, int(year), int(month), category): {'amount': amount, 'first_expense_id': first_id}
+                  for property_id, year, month, category, amount, first_id in connection.execute(category_query)}
+    return totals, categories
+
+
+def lock_properties(connection, property_ids=None):
+    """Row-lock the given properties (all when None) so rollup writers for one property take turns.
+
+    Without it, two READ COMMITTED transactions refreshing the same bucket would both
+    delete it and the second insert would hit the primary key. The aggregates that
+    follow also see whatever the previous writer committed. SQLite allows one
+    writer at a time anyway.
+    """
+    if connection.dialect.name == 'sqlite':
+        return
+    lock = select(properties.c.id).order_by(properties.c.id).with_for_update()
+    if property_ids is not None:
+        lock = lock.where(properties.c.id.in_(property_ids))
+    connection.execute(lock)
+
+
+def replace_rollups(connection, property_ids=None, buckets=None):
+    """Recompute rollup rows for the given properties (all when None), or just the given buckets.
+
+    Buckets are (property_id, year, month) tuples. Either way it is one DELETE, one
+    aggregate and one INSERT per rollup table, however many properties are involved.
+    """
+    monthly_delete, category_delete = delete(monthly), delete(by_category)
+    start = end = None
+    if buckets is not None:
+        buckets = sorted(buckets)
+        property_ids = sorted({property_id for property_id, _, _ in buckets})
+        months = sorted({(year, month) for _, year, month in buckets})
+        monthly_delete = monthly_delete.where(
+            tuple_(monthly.c.property_id, monthly.c.year, monthly.c.month).in_(buckets))
+        category_delete = category_delete.where(
+            tuple_(by_category.c.property_id, by_category.c.year, by_category.c.month).in_(buckets))
+        start, end = date(*months[0], 1), next_month(*months[-1])
+        buckets = set(buckets)
+    elif property_ids is not None:
+        monthly_delete = monthly_delete.where(monthly.c.property_id.in_(property_ids))
+        category_delete = category_delete.where(by_category.c.property_id.in_(property_ids))
+    lock_properties(connection, property_ids)
+    connection.execute(monthly_delete)
+    connection.execute(category_delete)
+
+    # The aggregate covers every month between the first and last bucket; rows outside the buckets are dropped
+    totals, categories = aggregate(connection, property_ids, start, end)
+    monthly_rows = [{'property_id': property_id, 'year': year, 'month': month, **values}
+                    for (property_id, year, month), values in totals.items()
+                    if buckets is None or (property_id, year, month) in buckets]
+    category_rows = [{'property_id': property_id, 'year': year, 'month': month, 'category': category, **values}
+                     for (property_id, year, month, category), values in categories.items()
+                     if buckets is None or (property_id, year, month) in buckets]
+    if monthly_rows:
+        connection.execute(insert(monthly), monthly_rows)
+    if category_rows:
+        connection.execute(insert(by_category), category_rows)
+
+
+def refresh_rollups(session, buckets):
+    """Recompute the given (property_id, year, month) buckets"""
+    buckets = {bucket for bucket in buckets if bucket[0] is not None}
+    if buckets:
+        replace_rollups(session.connection(), buckets=buckets)
+
+
+def payment_buckets(session, pairs):
+    """Map (lease_id, date) pairs to (property_id, year, month) buckets.
+
+    Leases and units deleted in the current flush are resolved from the session,
+    everything else from the database.
+    """
+    pairs = {(lease_id, day) for lease_id, day in pairs if lease_id is not None and day is not None}
+    unit_of = {obj.id: obj.unit_id for obj in session.deleted if isinstance(obj, Lease)}
+    property_of = {obj.id: obj.property_id for obj in session.deleted if isinstance(obj, Unit)}
+    connection = session.connection()
+
+    missing = {lease_id for lease_id, _ in pairs} - unit_of.keys()
+    if missing:
+        unit_of.update(connection.execute(
+            select(leases.c.id, leases.c.unit_id).where(leases.c.id.in_(missing))).all())
+    missing = set(unit_of.values()) - property_of.keys()
+    if missing:
+        property_of.update(connection.execute(
+            select(units.c.id, units.c.property_id).where(units.c.id.in_(missing))).all())
+
+    return {(property_of.get(unit_of.get(lease_id)), day.year, day.month) for lease_id, day in pairs}
+
+
+def expense_buckets(pairs):
+    """Map (property_id, date) pairs to (property_id, year, month) buckets"""
+    return {(property_id, day.year, day.month) for property_id, day in pairs
+            if property_id is not None and day is not None}
+
+
+# --- Keep the rollups in step with ORM writes ---
+
+def _old_and_new(obj, *keys):
+    """The before and after values of the given attributes for a flushed object"""
+    before, after = [], []
+    for key in keys:
+        history = inspect(obj).attrs[key].history
+        after.append((history.added or history.unchanged or [None])[0])
+        before.append((history.deleted or history.unchanged or [None])[0])
+    return {tuple(before), tuple(after)}
+
+
+def _changed_values(obj, key):
+    history = inspect(obj).attrs[key].history
+    return set(history.deleted) | set(history.added) if history.has_changes() else set()
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_rollup_buckets(session, flush_context):
+    payment_pairs, expense_pairs, rebuild = set(), set(), set()
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, Payment):
+            payment_pairs |= _old_and_new(obj, 'lease_id', 'date')
+        elif isinstance(obj, Expense):
+            expense_pairs |= _old_and_new(obj, 'property_id', 'date')
+        elif isinstance(obj, Lease) and obj not in session.new:
+            # A lease moved to another unit takes its payments to another property
+            moved_units = _changed_values(obj, 'unit_id')
+            if moved_units:
+                rebuild.update(session.connection().execute(
+                    select(units.c.property_id).where(units.c.id.in_(moved_units))).scalars())
+        elif isinstance(obj, Unit) and obj not in session.new:
+            rebuild |= _changed_values(obj, 'property_id')
+        elif isinstance(obj, Property) and obj in session.deleted:
+            rebuild.add(obj.id)
+
+    if payment_pairs or expense_pairs or rebuild:
+        buckets = payment_buckets(session, payment_pairs) | expense_buckets(expense_pairs)
+        session.info.setdefault('rollup_buckets', set()).update(buckets)
+        session.info.setdefault('rollup_properties', set()).update(rebuild - {None})
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _apply_rollup_buckets(session, flush_context):
+    buckets = session.info.pop('rollup_buckets', None)
+    rebuild = session.info.pop('rollup_properties', None)
+    if rebuild:
+        replace_rollups(session.connection(), sorted(rebuild))
+        buckets = {bucket for bucket in buckets if bucket[0] not in rebuild}
+    if buckets:
+        refresh_rollups(session, buckets)
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_rollup_buckets(session):
+    session.info.pop('rollup_buckets', None)
+    session.info.pop('rollup_properties', None)
+
+
+# --- CLI: flask rollups rebuild / flask rollups verify ---
+
+rollups_cli = AppGroup('rollups', help='Maintain the property x month report rollups.')
+
+
+@rollups_cli.command('rebuild')
+def rebuild_command():
+    """Backfill every rollup row from the payments and expenses tables"""
+    replace_rollups(db.session.connection())
+    # Cached financial reports are keyed on the rollup tables' versions too
+    bump_versions(db.session, [monthly.name, by_category.name])
+    db.session.commit()
+    click.echo(f"Rebuilt {PropertyMonthlyRollup.query.count()} monthly and "
+               f"{PropertyExpenseRollup.query.count()} category rollup rows.")
+
+
+@rollups_cli.command('verify')
+def verify_command():
+    """Compare stored rollups against the payments and expenses tables"""
+    totals, categories = aggregate(db.session.connection())
+    stored_totals = {(r.property_id, r.year, r.month): {'income': r.income, 'expense': r.expense}
+                     for r in db.session.execute(select(monthly))}
+    stored_categories = {(r.property_id, r.year, r.month, r.category):
+                         {'amount': r.amount, 'first_expense_id': r.first_expense_id}
+                         for r in db.session.execute(select(by_category))}
+
+    mismatches = 0
+    for expected, stored in ((totals, stored_totals), (categories, stored_categories)):
+        for key in expected.keys() | stored.keys():
+            want, have = expected.get(key), stored.get(key)
+            if want is None or have is None or any(abs(want[k] - have[k]) > 0.005 for k in want):
+                mismatches += 1
+                click.echo(f"{key}: stored {have}, expected {want}")
+    click.echo(f"Checked {len(totals)} monthly and {len(categories)} category buckets, {mismatches} mismatched.")
+    if mismatches:
+        raise SystemExit(1)
@@ -6,7 +6,7 @@ from schemas import (
     LeaseSchema, PaymentSchema
 )
 from auth import authenticate_user, create_user_token, admin_required
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from sqlalchemy import func, extract
 
 api = Blueprint('api', __name__)
@@ -86,11 +86,11 @@ def dashboard_stats():
         active_leases = Lease.query.filter_by(status='active').count()
 
         # Monthly revenue
-        current_month = datetime.now().month
-        current_year = datetime.now().year
+        month_start = date.today().replace(day=1)
+        next_month = (month_start + timedelta(days=32)).replace(day=1)
         monthly_revenue = db.session.query(func.sum(Payment.amount)).filter(
-            extract('month', Payment.payment_date) == current_month,
-            extract('year', Payment.payment_date) == current_year,
+            Payment.payment_date >= month_start,
+            Payment.payment_date < next_month,
             Payment.status == 'completed'
         ).scalar() or 0
 
@@ -281,16 +281,19 @@ def revenue_report():
     try:
         year = request.args.get('year', datetime.now().year, type=int)
 
+        # One range scan grouped by month instead of a query per month
+        month = extract('month', Payment.payment_date)
+        revenue_by_month = dict(db.session.query(month, func.sum(Payment.amount)).filter(
+            Payment.payment_date >= date(year, 1, 1),
+            Payment.payment_date < date(year + 1, 1, 1),
+            Payment.status == 'completed'
+        ).group_by(month).all())
+
         monthly_revenue = []
         for month in range(1, 13):
-            revenue = db.session.query(func.sum(Payment.amount)).filter(
-                extract('month', Payment.payment_date) == month,
-                extract('year', Payment.payment_date) == year,
-                Payment.status == 'completed'
-            ).scalar() or 0
             monthly_revenue.append({
                 'month': month,
-                'revenue': float(revenue)
+                'revenue': float(revenue_by_month.get(month) or 0)
             })
 
         return jsonify(monthly_revenue), 200
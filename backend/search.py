@@ -0,0 +1,122 @@
+import click
+from flask.cli import AppGroup
+from sqlalchemy import case, event, literal, or_, select, text, union_all
+from models import db
+
+# kind: (rowid code, table, title column, detail column). A row's index rowid is
+# id * 4 + code, so triggers can find it without scanning the index.
+SEARCH_SOURCES = {
+    'tenant': (1, 'tenants', 'name', 'contact'),
+    'property': (2, 'properties', 'name', 'address'),
+    'expense': (3, 'expenses', 'description', 'category'),
+}
+SEARCH_PAGE_SIZE = 20
+# The trigram index can only match terms of at least three characters
+MIN_TERM_LENGTH = 3
+
+
+def search_index_ddl():
+    """SQLite statements creating the FTS5 index and the triggers that keep it in sync"""
+    statements = ["CREATE VIRTUAL TABLE IF NOT EXISTS search_index "
+                  "USING fts5(kind UNINDEXED, title, detail, tokenize='trigram')"]
+    for kind, (code, table, title, detail) in SEARCH_SOURCES.items():
+        insert = (f"INSERT INTO search_index(rowid, kind, title, detail) "
+                  f"VALUES (new.id * 4 + {code}, '{kind}', new.{title}, new.{detail});")
+        delete = f"DELETE FROM search_index WHERE rowid = old.id * 4 + {code};"
+        statements += [
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_insert AFTER INSERT ON {table} BEGIN {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_update AFTER UPDATE OF {title}, {detail} ON {table} "
+            f"BEGIN {delete} {insert} END",
+            f"CREATE TRIGGER IF NOT EXISTS {table}_search_delete AFTER DELETE ON {table} BEGIN {delete} END",
+        ]
+    return statements
+
+
+def rebuild_search_index(connection):
+    """Refill the SQLite index from the source tables"""
+    connection.execute(text("DELETE FROM search_index"))
+    for kind, (code, table, title, detail) in SEARCH_SOURCES.items():
+        connection.execute(text(f"INSERT INTO search_index(rowid, kind, title, detail) "
+                                f"SELECT id * 4 + {code}, '{kind}', {title}, {detail} FROM {table}"))
+
+
+@event.listens_for(db.metadata, "after_create")
+def _create_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        for statement in search_index_ddl():
+            connection.execute(text(statement))
+
+
+@event.listens_for(db.metadata, "before_drop")
+def _drop_search_index(target, connection, **kw):
+    if connection.dialect.name == 'sqlite':
+        connection.execute(text("DROP TABLE IF EXISTS search_index"))
+
+
+def match_query(terms):
+    """FTS5 query matching rows that contain every term; each term is quoted so it is matched literally"""
+    return ' AND '.join('"{}"'.format(term.replace('"', '""')) for term in terms)
+
+
+def like_pattern(term, prefix_only=False):
+    escaped = term.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+    return f"{escaped}%" if prefix_only else f"%{escaped}%"
+
+
+def search_fts(terms, kinds, limit, offset):
+    """Ranked matches from the SQLite index; titles weigh ten times more than details"""
+    kind_list = ', '.join(f"'{kind}'" for kind in kinds)
+    return db.session.execute(text(
+        "SELECT kind, rowid / 4 AS id, title, detail FROM search_index "
+        f"WHERE search_index MATCH :query AND kind IN ({kind_list}) "
+        "ORDER BY bm25(search_index, 0, 10.0, 1.0), rowid LIMIT :limit OFFSET :offset"
+    ), {"query": match_query(terms), "limit": limit, "offset": offset}).all()
+
+
+def search_like(terms, kinds, limit, offset):
+    """Case-insensitive substring matches straight from the source tables.
+
+    Used on PostgreSQL, where migrations add pg_trgm indexes that serve ILIKE, and on
+    SQLite for terms too short for the trigram index. Titles starting with the first
+    term rank first, then titles containing it, then the rest.
+    """
+    queries = []
+    for kind in kinds:
+        _, table, title, detail = SEARCH_SOURCES[kind]
+        source = db.metadata.tables[table]
+        title, detail = source.c[title], source.c[detail]
+        rank = case((title.ilike(like_pattern(terms[0], True), escape='\\'), 0),
+                    (title.ilike(like_pattern(terms[0]), escape='\\'), 1), else_=2)
+        queries.append(select(literal(kind).label('kind'), source.c.id, title.label('title'),
+                              detail.label('detail'), rank.label('rank')).where(*(
+                                  or_(title.ilike(like_pattern(term), escape='\\'),
+                                      detail.ilike(like_pattern(term), escape='\\')) for term in terms)))
+    matches = union_all(*queries).subquery()
+    return db.session.execute(
+        select(matches.c.kind, matches.c.id, matches.c.title, matches.c.detail).order_by(
+            matches.c.rank, matches.c.kind, matches.c.id).limit(limit).offset(offset)).all()
+
+
+def search(q, kinds, limit, offset=0):
+    """One page of tenants, properties and expenses matching every word of q, best first"""
+    terms = q.split()
+    use_index = (db.session.get_bind().dialect.name == 'sqlite'
+                 and all(len(term) >= MIN_TERM_LENGTH for term in terms))
+    rows = (search_fts if use_index else search_like)(terms, kinds, limit, offset)
+    return [{"type": kind, "id": id, "title": title, "detail": detail} for kind, id, title, detail in rows]
+
+
+# --- CLI: flask search rebuild ---
+
+search_cli = AppGroup('search', help='Maintain the full-text search index.')
+
+
+@search_cli.command('rebuild')
+def rebuild_command():
+    """Refill the SQLite search index from tenants, properties and expenses"""
+    if db.session.get_bind().dialect.name != 'sqlite':
+        click.echo("Search reads the source tables directly on this database; nothing to rebuild.")
+        return
+    rebuild_search_index(db.session.connection())
+    db.session.commit()
+    click.echo("Search index rebuilt.")
@@ -1,18 +1,19 @@
+import argparse
+import random
+import time
 from app import app
 from models import db, User, Property, Unit, Tenant, Lease, Payment, Expense
+from ledger import refresh_ledgers
+from rollups import replace_rollups
+from versions import bump_versions
 from datetime import date, timedelta
+from sqlalchemy import delete, insert
 
 
 def seed_database():
     with app.app_context():
         print("Starting database seed...")
-        Expense.query.delete()
-        Payment.query.delete()
-        Lease.query.delete()
-        Tenant.query.delete()
-        Unit.query.delete()
-        Property.query.delete()
-        User.query.delete()
+        clear_database()
         print("Cleared existing data.")
 
         user1 = User(username='admin')
@@ -65,5 +66,164 @@ def seed_database():
         print("Database seeded successfully!")
 
 
+def clear_database():
+    """Delete every row, children first, including the derived rollups"""
+    for table in reversed(db.metadata.sorted_tables):
+        if table.name != 'table_versions':
+            db.session.execute(delete(table))
+    bump_versions(db.session, [table.name for table in db.metadata.sorted_tables if table.name != 'table_versions'])
+    db.session.commit()
+
+
+# --- Synthetic data for load testing: python seed.py --properties 1000 ... ---
+
+AREAS = ["Kilimani", "Westlands", "Kileleshwa", "Lavington", "South B", "South C", "Langata", "Karen",
+         "Ongata Rongai", "Kasarani", "Roysambu", "Embakasi", "Ruaka", "Syokimau", "Thika Road", "Ngong Road"]
+PROPERTY_NAMES = ["Apartments", "Residences", "Court", "Heights", "Gardens", "Towers", "Villas", "Plaza"]
+FIRST_NAMES = ["Achieng", "Amina", "Brian", "Cynthia", "David", "Esther", "Faith", "George", "Grace", "Hassan",
+               "Irene", "James", "Joy", "Kevin", "Lucy", "Mercy", "Moses", "Njeri", "Otieno", "Wanjiru"]
+LAST_NAMES = ["Kamau", "Odhiambo", "Mwangi", "Wanjala", "Kiprop", "Mutua", "Njoroge", "Omondi", "Chebet",
+              "Kariuki", "Barasa", "Nyambura", "Ochieng", "Wafula", "Karanja", "Muthoni"]
+METHODS = ["mpesa", "mpesa", "mpesa", "bank_transfer", "bank_transfer", "cash", "cheque"]
+EXPENSE_CATEGORIES = [("Repairs", 1500, 25000), ("Utilities", 3000, 20000), ("Maintenance", 2000, 15000),
+                      ("Security", 10000, 30000), ("Cleaning", 2000, 8000), ("Insurance", 5000, 40000),
+                      ("Tax", 5000, 50000)]
+
+# Payments per lease: (months between payments, days between payments, share of the monthly rent)
+PAYMENT_FREQUENCIES = {
+    'weekly': (0, 7, 12 / 52),
+    'biweekly': (0, 14, 12 / 26),
+    'monthly': (1, 0, 1),
+    'quarterly': (3, 0, 3),
+}
+BATCH_SIZE = 50000
+# Day the generated history runs up to unless --as-of says otherwise, so a seed gives the same rows on any day
+DEFAULT_AS_OF = date(2025, 6, 30)
+
+
+def add_months(day, months):
+    month = day.month - 1 + months
+    year, month = day.year + month // 12, month % 12 + 1
+    return date(year, month, min(day.day, 28))
+
+
+def insert_returning_ids(model, rows):
+    if not rows:
+        return []
+    return db.session.scalars(insert(model).returning(model.id, sort_by_parameter_order=True), rows).all()
+
+
+def insert_batched(model, rows):
+    """Insert from a row iterator in fixed-size batches; returns the row count"""
+    count, batch = 0, []
+    for row in rows:
+        batch.append(row)
+        if len(batch) == BATCH_SIZE:
+            db.session.execute(insert(model), batch)
+            count, batch = count + len(batch), []
+    if batch:
+        db.session.execute(insert(model), batch)
+        count += len(batch)
+    return count
+
+
+def generate_database(properties=50, units_per_property=10, years=3, payment_frequency='monthly', seed=1,
+                      as_of=DEFAULT_AS_OF):
+    """Replace the data with a deterministic synthetic portfolio ending on as_of, written with bulk inserts"""
+    rng = random.Random(seed)
+    first_day = add_months(as_of.replace(day=1), -12 * years)
+    months_step, days_step, rent_share = PAYMENT_FREQUENCIES[payment_frequency]
+    started = time.perf_counter()
+
+    with app.app_context():
+        clear_database()
+        admin = User(username='admin')
+        admin.password_hash = 'admin'
+        db.session.add(admin)
+        db.session.flush()
+
+        property_rows = [{"name": f"{rng.choice(AREAS)} {rng.choice(PROPERTY_NAMES)} {i + 1}",
+                          "address": f"{rng.randint(1, 400)} {rng.choice(AREAS)} Road"} for i in range(properties)]
+        property_ids = insert_returning_ids(Property, property_rows)
+        base_rents = [rng.randrange(8000, 60000, 500) for _ in property_ids]
+
+        # Each unit gets back-to-back leases (with occasional vacant gaps) across the whole window
+        unit_rows, unit_leases = [], []
+        for property_id, base_rent in zip(property_ids, base_rents):
+            for n in range(units_per_property):
+                leases, start = [], add_months(first_day, -rng.randint(0, 11))
+                while start <= as_of:
+                    end = add_months(start, rng.choice([6, 12, 12, 12, 24])) - timedelta(days=1)
+                    rent = round(base_rent * rng.uniform(0.85, 1.25) / 500) * 500
+                    leases.append((start, end, rent))
+                    start = add_months(end + timedelta(days=1), rng.choice([0, 0, 0, 0, 1, 2]))
+                occupied = bool(leases) and leases[-1][0] <= as_of <= leases[-1][1]
+                unit_rows.append({"property_id": property_id, "status": "occupied" if occupied else "vacant",
+                                  "unit_number": f"{n // 4 + 1}{'ABCD'[n % 4]}"})
+                unit_leases.append(leases)
+        unit_ids = insert_returning_ids(Unit, unit_rows)
+
+        lease_terms = [(unit_id, *terms) for unit_id, leases in zip(unit_ids, unit_leases) for terms in leases]
+        tenant_ids = insert_returning_ids(Tenant, [
+            {"name": f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}",
+             "contact": f"07{rng.randint(10000000, 99999999)}"} for _ in lease_terms])
+        lease_ids = insert_returning_ids(Lease, [
+            {"tenant_id": tenant_id, "unit_id": unit_id, "start_date": start, "end_date": end,
+             "rent_amount": rent, "total_paid": 0, "balance": rent}
+            for tenant_id, (unit_id, start, end, rent) in zip(tenant_ids, lease_terms)])
+
+        def payment_rows():
+            for lease_id, (_, start, end, rent) in zip(lease_ids, lease_terms):
+                due, amount = start, round(rent * rent_share, 2)
+                while due <= end and due <= as_of:
+                    roll = rng.random()
+                    if roll >= 0.03:  # 3% of payments are missed, 5% are partial
+                        paid = amount if roll >= 0.08 else round(amount * rng.uniform(0.4, 0.9), 2)
+                        day = min(due + timedelta(days=rng.randint(0, 6)), as_of)
+                        yield {"lease_id": lease_id, "amount": paid, "date": day, "method": rng.choice(METHODS)}
+                    due = add_months(due, months_step) if months_step else due + timedelta(days=days_step)
+
+        def expense_rows():
+            for property_id in property_ids:
+                month = first_day
+                while month <= as_of:
+                    for _ in range(rng.randint(1, 3)):
+                        category, low, high = rng.choice(EXPENSE_CATEGORIES)
+                        yield {"property_id": property_id, "category": category,
+                               "description": f"{category} for {month:%b %Y}", "amount": rng.randrange(low, high, 50),
+                               "date": min(month + timedelta(days=rng.randint(0, 27)), as_of)}
+                    month = add_months(month, 1)
+
+        payments = insert_batched(Payment, payment_rows())
+        expenses = insert_batched(Expense, expense_rows())
+
+        refresh_ledgers(db.session)
+        replace_rollups(db.session.connection())
+        bump_versions(db.session, [table.name for table in db.metadata.sorted_tables if table.name != 'table_versions'])
+        db.session.commit()
+
+    print(f"Generated {len(property_ids)} properties, {len(unit_ids)} units, {len(lease_ids)} leases, "
+          f"{payments} payments and {expenses} expenses in {time.perf_counter() - started:.1f}s.")
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Seed the database. With no options, loads the small demo dataset; "
+                    "with any option, generates a synthetic portfolio for load testing.")
+    parser.add_argument('--properties', type=int, help='number of properties (default 50)')
+    parser.add_argument('--units-per-property', type=int, help='units in each property (default 10)')
+    parser.add_argument('--years', type=int, help='years of lease, payment and expense history (default 3)')
+    parser.add_argument('--payment-frequency', choices=sorted(PAYMENT_FREQUENCIES),
+                        help='how often tenants pay (default monthly)')
+    parser.add_argument('--seed', type=int, help='random seed, same seed gives the same data (default 1)')
+    parser.add_argument('--as-of', type=date.fromisoformat,
+                        help=f'YYYY-MM-DD the history runs up to (default {DEFAULT_AS_OF})')
+    args = {key: value for key, value in vars(parser.parse_args()).items() if value is not None}
+    if args:
+        generate_database(**args)
+    else:
+        seed_database()
+
+
 if __name__ == '__main__':
-    seed_database()
+    main()
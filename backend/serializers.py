@@ -0,0 +1,146 @@
+import json
+from datetime import date, datetime, time
+from operator import attrgetter
+from sqlalchemy import inspect
+from sqlalchemy_serializer.lib.schema import Schema
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+_compiled = {}
+_paths = {}
+
+
+def _formatter(model, python_type):
+    if python_type is datetime:
+        fmt = model.datetime_format
+    elif python_type is date:
+        fmt = model.date_format
+    elif python_type is time:
+        fmt = model.time_format
+    else:
+        return None
+    return lambda value: value.strftime(fmt) if value is not None else None
+
+
+def _json_value(model, value):
+    if isinstance(value, time):
+        return value.strftime(model.time_format)
+    if isinstance(value, datetime):
+        return value.strftime(model.datetime_format)
+    if isinstance(value, date):
+        return value.strftime(model.date_format)
+    return value
+
+
+def _column_getter(model, key, column):
+    get = attrgetter(key)
+    try:
+        fmt = _formatter(model, column.type.python_type)
+    except NotImplementedError:
+        fmt = None
+    if fmt is None:
+        return get
+    return lambda obj: fmt(get(obj))
+
+
+def _relationship_getter(key, relationship, nested):
+    get = attrgetter(key)
+    if relationship.uselist:
+        return lambda obj: [nested(value) for value in get(obj)]
+    return lambda obj: nested(value) if (value := get(obj)) is not None else None
+
+
+def _computed_getter(model, key):
+    get = attrgetter(key)
+    return lambda obj: _json_value(model, get(obj))
+
+
+def _compile(model, schema):
+    """Resolve the model's serialize rules once into a flat list of (key, getter) pairs.
+
+    The rule tree is evaluated with sqlalchemy_serializer's own Schema so the
+    result has the same shape as SerializerMixin.to_dict.
+    """
+    schema.update(only=model.serialize_only, extend=model.serialize_rules)
+    mapper = inspect(model)
+    keys = schema.keys
+    if schema.is_greedy:
+        keys.update(attr.key for attr in mapper.attrs)
+
+    ordered = [attr.key for attr in mapper.column_attrs if attr.key in keys]
+    ordered += [rel.key for rel in mapper.relationships if rel.key in keys]
+    ordered += sorted(keys.difference(ordered))
+
+    getters = []
+    for key in ordered:
+        if not schema.is_included(key):
+            continue
+        if key in mapper.relationships:
+            relationship = mapper.relationships[key]
+            nested = _compile(relationship.mapper.class_, schema.fork(key))
+            getters.append(
+                (key, _relationship_getter(key, relationship, nested)))
+        elif key in mapper.column_attrs:
+            column = mapper.column_attrs[key].columns[0]
+            getters.append((key, _column_getter(model, key, column)))
+        else:
+            getters.append((key, _computed_getter(model, key)))
+
+    def serialize(obj):
+        return {key: get(obj) for key, get in getters}
+    return serialize
+
+
+def _relationship_paths(model, schema, prefix):
+    schema.update(only=model.serialize_only, extend=model.serialize_rules)
+    paths = []
+    for relationship in inspect(model).relationships:
+        key = relationship.key
+        if (schema.is_greedy or key in schema.keys) and schema.is_included(key):
+            paths.append(prefix + key)
+            paths += _relationship_paths(relationship.mapper.class_, schema.fork(key), f"{prefix}{key}.")
+    return paths
+
+
+def relationship_paths(model):
+    """Dotted paths of every relationship the model's default serialization nests, e.g. 'unit.property'"""
+    paths = _paths.get(model)
+    if paths is None:
+        paths = _paths[model] = tuple(_relationship_paths(model, Schema(), ''))
+    return paths
+
+
+def expand_rules(model, expand):
+    """Rules that drop every nested relationship except the expanded paths (which include their parents)"""
+    return tuple(f"-{path}" for path in relationship_paths(model)
+                 if path not in expand and ('.' not in path or path.rsplit('.', 1)[0] in expand))
+
+
+def serializer_for(model, only=(), rules=(), expand=None):
+    """Compiled equivalent of model.to_dict(only=only, rules=rules), cached per model and rule set.
+
+    With expand, only those relationship paths are nested; the rest are left out.
+    """
+    cache_key = (model, tuple(only), tuple(rules), expand)
+    serializer = _compiled.get(cache_key)
+    if serializer is None:
+        if expand is not None:
+            rules = tuple(rules) + expand_rules(model, expand)
+        schema = Schema()
+        schema.update(only=only, extend=rules)
+        serializer = _compiled[cache_key] = _compile(model, schema)
+    return serializer
+
+
+def to_dict(item, only=(), rules=(), expand=None):
+    return serializer_for(type(item), only, rules, expand)(item)
+
+
+def dumps(data, indent=False):
+    """Encode to JSON bytes, using orjson when it is installed"""
+    if orjson is not None:
+        return orjson.dumps(data, option=orjson.OPT_INDENT_2 if indent else 0)
+    return json.dumps(data, indent=4 if indent else None, separators=None if indent else (',', ':')).encode()
@@ -0,0 +1,74 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture(scope='session')
+def app(tmp_path_factory):
+    """The Flask app on a throwaway SQLite database holding a small portfolio generated up to seed.DEFAULT_AS_OF"""
+    # app.py reads DB_URI when it is imported
+    os.environ['DB_URI'] = f"sqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}"
+    from app import app
+    from models import db
+    from seed import generate_database
+
+    # A test module importing app (or seed) at the top would have bound the real app.db
+    assert app.config['SQLALCHEMY_DATABASE_URI'] == os.environ['DB_URI'], "app was imported before conftest set DB_URI"
+    with app.app_context():
+        db.create_all()
+    generate_database(properties=5, units_per_property=4, years=2)
+    return app
+
+
+@pytest.fixture
+def client(app):
+    from cache import response_cache
+
+    # Cached reports would answer without touching the database
+    response_cache.store.clear()
+    return app.test_client()
+
+
+@pytest.fixture(scope='session')
+def ids(app):
+    from query_shapes import sample_ids
+    from seed import DEFAULT_AS_OF
+
+    with app.app_context():
+        return sample_ids(DEFAULT_AS_OF.year)
+
+
+@pytest.fixture
+def query_budget(app):
+    """query_shapes.query_budget bound to the app's engine.
+
+        with query_budget(3):
+            client.get("/units")
+    """
+    from models import db
+    from query_shapes import query_budget
+
+    with app.app_context():
+        engine = db.engine
+    return lambda max_queries=None, threshold=5: query_budget(max_queries, threshold, engine)
+
+
+@pytest.fixture
+def new_lease(client):
+    """Factory creating a lease, through the API, on a new unit of a new property (or of property_id).
+
+        lease = new_lease(rent_amount=1000, start_date="2025-01-01")
+        lease["id"], lease["property_id"]
+    """
+    def create(property_id=None, **fields):
+        if property_id is None:
+            property_id = client.post("/properties", json={"name": "Test Court", "address": "1 Test Road"}).get_json()["id"]
+        unit_id = client.post("/units", json={"unit_number": "T1", "property_id": property_id, "status": "occupied"}).get_json()["id"]
+        tenant_id = client.post("/tenants", json={"name": "Test Tenant", "contact": "0700000000"}).get_json()["id"]
+        response = client.post("/leases", json={"tenant_id": tenant_id, "unit_id": unit_id, "start_date": "2025-01-01",
+                                                "rent_amount": 1000, **fields})
+        assert response.status_code == 201, response.get_json()
+        return {**response.get_json(), "property_id": property_id}
+    return create
@@ -0,0 +1,51 @@
+import pytest
+
+
+@pytest.fixture
+def lease_in_arrears(client, new_lease):
+    """A 1000/month lease from 2025-01-01 with 1500 paid by mid-June and 2000 paid after"""
+    lease = new_lease(rent_amount=1000, start_date="2025-01-01")
+    for amount, date in ((1000, "2025-01-03"), (500, "2025-02-10"), (2000, "2025-07-01")):
+        client.post("/payments", json={"lease_id": lease["id"], "amount": amount, "date": date})
+    return lease
+
+
+def report(client, lease, as_of):
+    response = client.get(f"/reports/arrears?as_of={as_of}&property_id={lease['property_id']}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+@pytest.mark.parametrize('as_of, periods, buckets', [
+    # Jan-Jun due (Jun 14 days old, May 45, Apr 75, Mar 106); what is owed is the newest 4500
+    ("2025-06-15", 6, (1000, 1000, 1000, 1500)),
+    # An installment exactly 30, 60 or 90 days old stays in the younger bucket
+    ("2025-05-31", 5, (1000, 1000, 0, 1500)),  # May 1 is 30 days old, Apr 1 60, Mar 1 91
+    ("2025-05-30", 5, (1000, 1000, 1000, 500)),  # Mar 1 is 90 days old
+    ("2025-04-01", 4, (1000, 1500, 0, 0)),  # Mar 1 is 31 days old, Feb 1 59
+    # Only Jan due and paid
+    ("2025-01-15", 1, (0, 0, 0, 0)),
+])
+def test_aging_buckets(client, lease_in_arrears, as_of, periods, buckets):
+    body = report(client, lease_in_arrears, as_of)
+    totals = body["totals"]
+    assert (totals["days_0_30"], totals["days_31_60"], totals["days_61_90"], totals["days_90_plus"]) == buckets
+    assert totals["accrued"] == periods * 1000
+    assert totals["paid"] == (1500 if periods > 1 else 1000)
+    assert totals["arrears"] == sum(buckets)
+    assert [row["periods_due"] for row in body["leases"]] == ([periods] if sum(buckets) else [])
+
+
+def test_payments_after_as_of_are_not_counted(client, lease_in_arrears):
+    totals = report(client, lease_in_arrears, "2025-07-01")["totals"]
+    assert totals["paid"] == 3500
+    assert totals["arrears"] == 3500
+    # Owed: Jul 1 and Jun 1 (30 days old), May 1 (61 days) and 500 of Apr 1 (91 days)
+    assert (totals["days_0_30"], totals["days_31_60"], totals["days_61_90"], totals["days_90_plus"]) == (2000, 0, 1000, 500)
+
+
+def test_ended_lease_stops_accruing(client, new_lease):
+    lease = new_lease(rent_amount=1000, start_date="2025-01-01", end_date="2025-03-31")
+    totals = report(client, lease, "2025-12-31")["totals"]
+    assert totals["accrued"] == 3000
+    assert totals["days_90_plus"] == 3000
@@ -0,0 +1,63 @@
+from test_ledger import ledger
+from test_rollups import buckets
+
+
+def test_bulk_patch_moves_payments_between_leases_and_months(app, client, new_lease):
+    first, second = new_lease(rent_amount=1000), new_lease(rent_amount=800)
+    ids = [client.post("/payments", json={"lease_id": first["id"], "amount": amount, "date": date}).get_json()["id"]
+           for amount, date in ((300, "2025-01-05"), (200, "2025-02-05"), (100, "2025-03-05"))]
+
+    response = client.patch("/payments", json={"ids": ids[1:], "changes": {"lease_id": second["id"], "date": "2025-04-10"}})
+    assert response.get_json() == {"updated": 2}
+    assert ledger(client, first["id"]) == (300, 700, "2025-01-05")
+    assert ledger(client, second["id"]) == (300, 500, "2025-04-10")
+    assert buckets(app, first["property_id"])[0] == {(2025, 1): (300, 0)}
+    assert buckets(app, second["property_id"])[0] == {(2025, 4): (300, 0)}
+
+    response = client.patch("/payments", json={"filter": {"lease_id": second["id"]}, "changes": {"amount": 50}})
+    assert response.get_json() == {"updated": 2}
+    assert ledger(client, second["id"]) == (100, 700, "2025-04-10")
+    assert buckets(app, second["property_id"])[0] == {(2025, 4): (100, 0)}
+
+
+def test_bulk_patch_moves_expenses_between_properties(app, client, new_lease):
+    first, second = new_lease()["property_id"], new_lease()["property_id"]
+    ids = [client.post("/expenses", json={"property_id": first, "category": "Repairs", "amount": amount,
+                                          "date": "2025-01-10"}).get_json()["id"] for amount in (100, 60)]
+
+    client.patch("/expenses", json={"ids": ids[:1], "changes": {"property_id": second}})
+    assert buckets(app, first) == ({(2025, 1): (0, 60)}, {(2025, 1, "Repairs"): 60})
+    assert buckets(app, second) == ({(2025, 1): (0, 100)}, {(2025, 1, "Repairs"): 100})
+
+
+def test_bulk_delete_updates_ledgers_and_rollups(app, client, new_lease):
+    lease = new_lease(rent_amount=1000)
+    ids = [client.post("/payments", json={"lease_id": lease["id"], "amount": amount, "date": date}).get_json()["id"]
+           for amount, date in ((300, "2025-01-05"), (200, "2025-02-05"))]
+
+    assert client.delete("/payments", json={"ids": ids[1:]}).get_json() == {"deleted": 1, "cascaded": {}}
+    assert ledger(client, lease["id"]) == (300, 700, "2025-01-05")
+    assert buckets(app, lease["property_id"])[0] == {(2025, 1): (300, 0)}
+
+    assert client.delete("/payments", json={"filter": {"lease_id": lease["id"]}}).get_json()["deleted"] == 1
+    assert ledger(client, lease["id"]) == (0, 1000, None)
+    assert buckets(app, lease["property_id"])[0] == {}
+
+
+def test_bulk_delete_cascades_into_the_rollups(app, client, new_lease):
+    lease = new_lease()
+    client.post("/payments", json={"lease_id": lease["id"], "amount": 300, "date": "2025-01-05"})
+    client.post("/expenses", json={"property_id": lease["property_id"], "category": "Repairs", "amount": 100,
+                                   "date": "2025-01-10"})
+
+    response = client.delete("/leases", json={"ids": [lease["id"]]})
+    assert response.get_json() == {"deleted": 1, "cascaded": {"payments": 1}}
+    assert buckets(app, lease["property_id"]) == ({(2025, 1): (0, 100)}, {(2025, 1, "Repairs"): 100})
+
+    response = client.delete("/properties", json={"ids": [lease["property_id"]]})
+    assert response.get_json()["cascaded"] == {"units": 1, "expenses": 1}
+    assert buckets(app, lease["property_id"]) == ({}, {})
+
+    for command in ("ledger", "rollups"):
+        result = app.test_cli_runner().invoke(args=[command, "verify"])
+        assert result.exit_code == 0, result.output
@@ -0,0 +1,61 @@
+def ledger(client, lease_id):
+    lease = client.get(f"/leases/{lease_id}").get_json()
+    return lease["total_paid"], lease["balance"], lease["last_payment_date"]
+
+
+def pay(client, lease_id, amount, date):
+    response = client.post("/payments", json={"lease_id": lease_id, "amount": amount, "date": date})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_payments_update_the_ledger(client, new_lease):
+    lease = new_lease(rent_amount=1000)["id"]
+    pay(client, lease, 300, "2025-02-01")
+    pay(client, lease, 200, "2025-03-05")
+    assert ledger(client, lease) == (500, 500, "2025-03-05")
+
+    client.post("/payments", json=[{"lease_id": lease, "amount": 50, "date": "2025-01-20"},
+                                    {"lease_id": lease, "amount": 25, "date": "2025-04-01"}])
+    assert ledger(client, lease) == (575, 425, "2025-04-01")
+
+
+def test_moving_a_payment_updates_both_leases(client, new_lease):
+    first, second = new_lease(rent_amount=1000)["id"], new_lease(rent_amount=800)["id"]
+    pay(client, first, 300, "2025-02-01")
+    moved = pay(client, first, 200, "2025-03-05")
+
+    assert client.patch(f"/payments/{moved}", json={"lease_id": second}).status_code == 200
+    assert ledger(client, first) == (300, 700, "2025-02-01")
+    assert ledger(client, second) == (200, 600, "2025-03-05")
+
+    assert client.patch(f"/payments/{moved}", json={"amount": 250, "date": "2025-01-10"}).status_code == 200
+    assert ledger(client, second) == (250, 550, "2025-01-10")
+
+
+def test_deleting_payments_updates_the_ledger(client, new_lease):
+    lease = new_lease(rent_amount=1000)["id"]
+    kept = pay(client, lease, 300, "2025-02-01")
+    deleted = pay(client, lease, 200, "2025-03-05")
+
+    assert client.delete(f"/payments/{deleted}").status_code == 204
+    assert ledger(client, lease) == (300, 700, "2025-02-01")
+    assert client.delete(f"/payments/{kept}").status_code == 204
+    assert ledger(client, lease) == (0, 1000, None)
+
+
+def test_rent_change_keeps_the_balance_in_step(client, new_lease):
+    lease = new_lease(rent_amount=1000)["id"]
+    pay(client, lease, 300, "2025-02-01")
+
+    assert client.patch(f"/leases/{lease}", json={"rent_amount": 1200}).status_code == 200
+    assert ledger(client, lease) == (300, 900, "2025-02-01")
+
+
+def test_ledger_verify_finds_no_mismatches(app, client, new_lease):
+    lease = new_lease()["id"]
+    pay(client, lease, 300, "2025-02-01")
+
+    result = app.test_cli_runner().invoke(args=["ledger", "verify"])
+    assert result.exit_code == 0, result.output
+    assert " 0 mismatched" in result.output
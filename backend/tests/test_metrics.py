@@ -0,0 +1,24 @@
+import time
+from flask import g
+from sqlalchemy import text
+
+
+def test_db_time_includes_fetching_rows(app):
+    from models import db
+
+    def slow(value):
+        time.sleep(0.005)
+        return value
+
+    with app.test_request_context():
+        g.request_metrics = {'started': time.perf_counter(), 'queries': 0, 'db': 0.0}
+        db.session.connection().connection.driver_connection.create_function('slow', 1, slow)
+        # SQLite computes each row as it is fetched, not when the statement is executed
+        rows = db.session.execute(text("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 20) "
+                                       "SELECT slow(i) FROM n")).all()
+        db.session.rollback()
+        stats = g.request_metrics
+
+    assert len(rows) == 20
+    assert stats['queries'] == 1
+    assert stats['db'] >= 20 * 0.005
@@ -0,0 +1,26 @@
+import pytest
+from query_shapes import QUERY_BUDGETS
+
+
+@pytest.mark.parametrize('template, budget', QUERY_BUDGETS, ids=[template for template, _ in QUERY_BUDGETS])
+def test_endpoint_stays_within_query_budget(client, ids, query_budget, template, budget):
+    with query_budget(budget):
+        response = client.get(template.format(**ids))
+    assert response.status_code == 200
+
+
+def test_bulk_create_is_not_reported_as_n_plus_one(client, ids, query_budget):
+    rows = [{"lease_id": ids["lease_id"], "amount": 100, "date": "2026-01-15"} for _ in range(20)]
+    with query_budget():
+        response = client.post("/payments", json=rows)
+    assert response.status_code == 201
+
+
+def test_repeated_statements_fail_the_budget(app, query_budget):
+    from models import db, Lease
+
+    with pytest.raises(AssertionError, match="repeated more than 2 times"):
+        with query_budget(threshold=2), app.app_context():
+            for lease in Lease.query.limit(4).all():
+                db.session.expire(lease)
+                lease.unit
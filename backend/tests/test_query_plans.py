@@ -0,0 +1,8 @@
+import pytest
+from query_plans import PLAN_CHECKS, unexpected_scans
+
+
+@pytest.mark.parametrize('template, allowed', PLAN_CHECKS, ids=[template for template, _ in PLAN_CHECKS])
+def test_endpoint_avoids_table_scans(app, client, ids, template, allowed):
+    scans = unexpected_scans(app, client, template.format(**ids), allowed)
+    assert not scans, '\n'.join(f"full scan of {table}: {' '.join(statement.split())}" for table, statement in scans)
@@ -0,0 +1,36 @@
+from datetime import timedelta
+from sqlalchemy import or_
+from rent_roll import rent_roll
+
+
+def test_unit_marked_vacant_but_leased_is_not_counted_as_exposure(app):
+    from models import db, Lease
+    from seed import DEFAULT_AS_OF  # imports app, so not before conftest has pointed DB_URI elsewhere
+
+    today = DEFAULT_AS_OF
+    first_month = today.replace(day=1)
+    with app.app_context():
+        lease = Lease.query.filter(Lease.start_date <= first_month, or_(
+            Lease.end_date.is_(None), Lease.end_date >= today + timedelta(days=62))).order_by(Lease.id).first()
+        unit, property_id = lease.unit, lease.unit.property_id
+        status = unit.status
+
+        def report():
+            (row,) = rent_roll(first_month, 2, today, property_id)["properties"]
+            return row
+
+        unit.status = 'occupied'
+        db.session.commit()
+        occupied = report()
+        try:
+            unit.status = 'vacant'
+            db.session.commit()
+            vacant = report()
+        finally:
+            unit.status = status
+            db.session.commit()
+
+    assert vacant["vacant_units"] == occupied["vacant_units"] + 1
+    assert vacant["expected_income"] == occupied["expected_income"]
+    assert vacant["vacancy_exposure"] == occupied["vacancy_exposure"]
+    assert vacant["expected_income"][0] > 0
@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize('report, params', [
+    ("rent_roll", {"from": 20250101}),
+    ("rent_roll", {"months": [12]}),
+    ("arrears", {"as_of": 20250101}),
+    ("property_financials", {"from": {"year": 2025}}),
+])
+def test_non_string_params_are_rejected_as_bad_requests(client, report, params):
+    response = client.post("/reports/jobs", json={"report": report, "params": params})
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+
+
+def test_numeric_params_are_read_like_query_string_values(client, ids):
+    response = client.post("/reports/jobs", json={"report": "rent_roll", "params": {"months": 3, "property_id": ids["property_id"]}})
+    assert response.status_code == 202
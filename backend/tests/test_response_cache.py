@@ -0,0 +1,18 @@
+from concurrent.futures import ThreadPoolExecutor
+from cache import ResponseCache, MemoryStore
+
+
+def test_counters_add_up_under_concurrent_fetches(app):
+    cache = ResponseCache()
+    cache.store = MemoryStore(max_entries=8)
+
+    def fetch(i):
+        with app.app_context():
+            return cache.fetch(["key", i % 16], ('leases',), lambda: i % 16)
+
+    with ThreadPoolExecutor(max_workers=8) as pool:
+        results = list(pool.map(fetch, range(2000)))
+
+    assert results == [i % 16 for i in range(2000)]
+    stats = cache.stats()
+    assert stats["hits"] + stats["misses"] == 2000
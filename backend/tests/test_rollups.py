@@ -0,0 +1,70 @@
+def buckets(app, property_id):
+    """{(year, month): (income, expense)} and {(year, month, category): amount} stored for a property"""
+    from models import PropertyMonthlyRollup, PropertyExpenseRollup
+
+    with app.app_context():
+        monthly = {(r.year, r.month): (r.income, r.expense)
+                   for r in PropertyMonthlyRollup.query.filter_by(property_id=property_id)}
+        categories = {(r.year, r.month, r.category): r.amount
+                      for r in PropertyExpenseRollup.query.filter_by(property_id=property_id)}
+    # A bucket emptied by a move may be kept as zeros
+    return ({key: value for key, value in monthly.items() if value != (0, 0)},
+            {key: value for key, value in categories.items() if value})
+
+
+def test_payment_moves_update_income_buckets(app, client, new_lease):
+    first = new_lease()
+    second = new_lease()
+    payment = client.post("/payments", json={"lease_id": first["id"], "amount": 500, "date": "2025-01-15"}).get_json()["id"]
+    client.post("/payments", json={"lease_id": first["id"], "amount": 300, "date": "2025-01-20"})
+    assert buckets(app, first["property_id"])[0] == {(2025, 1): (800, 0)}
+
+    client.patch(f"/payments/{payment}", json={"date": "2025-03-01"})
+    assert buckets(app, first["property_id"])[0] == {(2025, 1): (300, 0), (2025, 3): (500, 0)}
+
+    client.patch(f"/payments/{payment}", json={"lease_id": second["id"], "amount": 450})
+    assert buckets(app, first["property_id"])[0] == {(2025, 1): (300, 0)}
+    assert buckets(app, second["property_id"])[0] == {(2025, 3): (450, 0)}
+
+    client.delete(f"/payments/{payment}")
+    assert buckets(app, second["property_id"])[0] == {}
+
+
+def test_expense_moves_update_expense_buckets(app, client, new_lease):
+    first, second = new_lease()["property_id"], new_lease()["property_id"]
+    expense = client.post("/expenses", json={"property_id": first, "category": "Repairs", "amount": 100,
+                                             "date": "2025-01-10"}).get_json()["id"]
+    client.post("/expenses", json={"property_id": first, "category": "Utilities", "amount": 40, "date": "2025-01-12"})
+    assert buckets(app, first) == ({(2025, 1): (0, 140)}, {(2025, 1, "Repairs"): 100, (2025, 1, "Utilities"): 40})
+
+    client.patch(f"/expenses/{expense}", json={"date": "2025-02-03", "category": "Security"})
+    assert buckets(app, first) == ({(2025, 1): (0, 40), (2025, 2): (0, 100)},
+                                   {(2025, 1, "Utilities"): 40, (2025, 2, "Security"): 100})
+
+    client.patch(f"/expenses/{expense}", json={"property_id": second})
+    assert buckets(app, first) == ({(2025, 1): (0, 40)}, {(2025, 1, "Utilities"): 40})
+    assert buckets(app, second) == ({(2025, 2): (0, 100)}, {(2025, 2, "Security"): 100})
+
+    client.delete(f"/expenses/{expense}")
+    assert buckets(app, second) == ({}, {})
+
+
+def test_financials_report_reads_the_moved_buckets(client, new_lease):
+    lease = new_lease()
+    payment = client.post("/payments", json={"lease_id": lease["id"], "amount": 500, "date": "2025-01-15"}).get_json()["id"]
+    url = f"/reports/property_financials?property_id={lease['property_id']}&from=2025-01-01&to=2025-03-31"
+    before = client.get(url).get_json()
+
+    client.patch(f"/payments/{payment}", json={"date": "2025-03-01"})
+    after = client.get(url).get_json()
+    assert before != after
+    assert [period["Income"] for period in after["monthly_breakdown"]] == [0, 0, 500]
+
+
+def test_rollups_verify_finds_no_mismatches(app, client, new_lease):
+    lease = new_lease()
+    client.post("/payments", json={"lease_id": lease["id"], "amount": 500, "date": "2025-01-15"})
+
+    result = app.test_cli_runner().invoke(args=["rollups", "verify"])
+    assert result.exit_code == 0, result.output
+    assert " 0 mismatched" in result.output
@@ -0,0 +1,77 @@
+import hashlib
+import json
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+from models import TableVersion
+
+versions = TableVersion.__table__
+
+# Tables whose rows change as a side effect of writes to another table
+DERIVED_TABLES = {
+    'payments': ('leases',),  # lease ledger columns
+}
+
+
+def expand_tables(tables):
+    expanded = set(tables)
+    for table in tables:
+        expanded.update(DERIVED_TABLES.get(table, ()))
+    return expanded
+
+
+def current_versions(session, tables):
+    """Generation counters of the given tables, in order (0 for a table never written)"""
+    rows = dict(session.execute(select(versions.c.table_name, versions.c.version).where(
+        versions.c.table_name.in_(tables))).all())
+    return tuple(rows.get(table, 0) for table in tables)
+
+
+def table_etag(session, tables, *extra):
+    """Strong ETag for a representation built only from the given tables (and extra inputs)"""
+    state = json.dumps([list(tables), current_versions(session, tables), *extra], default=str)
+    return hashlib.sha1(state.encode()).hexdigest()
+
+
+def bump_versions(session, tables):
+    """Advance the generation counters of the given tables inside the current transaction"""
+    tables = expand_tables(tables)
+    if not tables:
+        return
+    connection = session.connection()
+    result = connection.execute(update(versions).where(versions.c.table_name.in_(tables)).values(
+        version=versions.c.version + 1))
+    if result.rowcount < len(tables):
+        existing = set(connection.execute(select(versions.c.table_name).where(
+            versions.c.table_name.in_(tables))).scalars())
+        connection.execute(insert(versions), [{'table_name': table, 'version': 1}
+                                              for table in sorted(tables - existing)])
+
+
+# --- Bump the counters of every table an ORM write touches ---
+
+@event.listens_for(Session, "after_flush")
+def _collect_written_tables(session, flush_context):
+    touched = session.info.setdefault('written_tables', set())
+    for obj in session.new | session.dirty | session.deleted:
+        if isinstance(obj, TableVersion) or (obj in session.dirty and not session.is_modified(obj)):
+            continue
+        touched.add(obj.__table__.name)
+
+
+@event.listens_for(Session, "after_flush_postexec")
+def _apply_written_tables(session, flush_context):
+    touched = session.info.pop('written_tables', None)
+    if touched:
+        bump_versions(session, touched)
+
+
+@event.listens_for(Session, "do_orm_execute")
+def _bump_for_bulk_writes(orm_execute_state):
+    # Query.update() / Query.delete() and ORM-enabled update()/delete() skip the flush
+    if (orm_execute_state.is_update or orm_execute_state.is_delete) and orm_execute_state.bind_mapper:
+        bump_versions(orm_execute_state.session, [orm_execute_state.bind_mapper.local_table.name])
+
+
+@event.listens_for(Session, "after_rollback")
+def _discard_written_tables(session):
+    session.info.pop('written_tables', None)